@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+from core.page_extractor import EXTRACTORS, etree, get_extractor
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+PATHS = ["contact-us", "about", "careers", "projects", "blog", "services", "team", "news"]
+NAMES = ["info", "sales", "admin", "hr", "john.doe", "careers", "support"]
+
+def make_page(rng, links, size_kb):
+    """Build a WordPress-like page with links, entities, scripts and planted emails"""
+    parts = ["<!DOCTYPE html><html><head><title>Site</title>",
+             "<link rel='stylesheet' href='/wp-content/style.css'>",
+             "<script>var cfg = {\"url\": \"https://example.com/wp-json/\"};</script></head><body>"]
+    for i in range(links):
+        path = rng.choice(PATHS)
+        text = rng.choice([path.replace("-", " ").title(), "<span>Read</span> more", "<img src='x.png'>", "&amp; more"])
+        parts.append(f"<li><a class='nav' href='/{path}/{i}/?utm_source=x#top'>{text}</a></li>")
+    parts.append(f"<a href='mailto:{rng.choice(NAMES)}@example.com'>Email us</a>")
+    while sum(map(len, parts)) < size_kb * 1024:
+        words = " ".join(rng.choice(WORDS) for _ in range(40))
+        if rng.random() < 0.1:
+            words += f" {rng.choice(NAMES)}@example.com, {rng.choice(NAMES)}&#64;example.org"
+        parts.append(f"<p>{words}</p>")
+    parts.append("<footer>Call us or write to info@example.com</footer></body></html>")
+    return "".join(parts)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare CPU per page of the HTML extractors')
+    parser.add_argument('--pages', type=int, default=200, help='Number of synthetic pages')
+    parser.add_argument('--links', type=int, default=150, help='Links per page')
+    parser.add_argument('--size', type=int, default=60, help='Approximate page size in KB')
+    parser.add_argument('--chunk', type=int, default=16384, help='Feed size in characters for streaming extractors')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [make_page(rng, args.links, args.size) for _ in range(args.pages)]
+    names = ["bs4"] + [name for name in EXTRACTORS if name != "bs4" and (name != "lxml" or etree is not None)]
+
+    # Reference results from the original BeautifulSoup path
+    expected = []
+    for page in pages:
+        extractor = get_extractor("bs4")
+        extractor.feed(page)
+        expected.append(extractor.close())
+
+    print(f"{args.pages} pages, ~{args.size} KB and {args.links} links each\n")
+    print(f"{'Extractor':<12}{'CPU ms/page':>14}{'Speedup':>10}{'Same results':>14}")
+    baseline = None
+    for name in names:
+        results = []
+        start = time.process_time()
+        for page in pages:
+            extractor = get_extractor(name)
+            for i in range(0, len(page), args.chunk):
+                extractor.feed(page[i:i + args.chunk])
+            results.append(extractor.close())
+        cpu_ms = (time.process_time() - start) * 1000 / args.pages
+        baseline = baseline or cpu_ms
+        same_links = all(got[0] == want[0] for got, want in zip(results, expected))
+        same_emails = all(got[1] == want[1] for got, want in zip(results, expected))
+        print(f"{name:<12}{cpu_ms:>14.2f}{baseline / cpu_ms:>9.1f}x{'yes' if same_links and same_emails else 'NO':>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from core.email_report import EmailReport, write_email_csv
+
+NAMES = ["info", "sales", "admin", "hr", "contact", "support", "office", "careers"]
+
+def make_sites(rng, emails, per_site):
+    """(website, [emails]) pairs, `per_site` emails each, as the scraper returns them"""
+    sites = []
+    for i in range(0, emails, per_site):
+        domain = f"site{i // per_site}.example.com"
+        sites.append((f"https://{domain}/", [f"{rng.choice(NAMES)}{j}@{domain}" for j in range(min(per_site, emails - i))]))
+    return sites
+
+def concat_per_email(sites):
+    """The old loop: one pd.concat per email"""
+    all_emails_df = pd.DataFrame(columns=['Website', 'Email'])
+    for website, emails in sites:
+        for email in emails:
+            all_emails_df = pd.concat([all_emails_df, pd.DataFrame({'Website': [website], 'Email': [email]})], ignore_index=True)
+    return all_emails_df
+
+def columnar(sites):
+    report = EmailReport(tempfile.gettempdir())
+    for website, emails in sites:
+        report.add(website, emails)
+    return report.to_frame()
+
+def same_rows(a, b):
+    # Compare values only: the old loop leaves object columns, a fresh frame may get pandas' string dtype
+    return a.values.tolist() == b.values.tolist()
+
+def measure(fn, *args):
+    """Wall time of one untraced run, then peak traced memory of a second run"""
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ways of building the consolidated email report')
+    parser.add_argument('--emails', type=int, default=100000, help='Number of synthetic emails')
+    parser.add_argument('--per-site', type=int, default=20, help='Emails per website')
+    parser.add_argument('--concat-emails', type=int, default=None,
+                        help='Run the old pd.concat loop on this many emails (default all, it takes minutes), 0 to skip')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sites = make_sites(random.Random(args.seed), args.emails, args.per_site)
+    print(f"{args.emails} emails over {len(sites)} websites\n")
+    print(f"{'Method':<28}{'Emails':>9}{'Seconds':>10}{'Peak MB':>10}{'Same rows':>11}")
+
+    expected, seconds, peak = measure(columnar, sites)
+    print(f"{'columnar, built once':<28}{args.emails:>9}{seconds:>10.3f}{peak:>10.1f}{'-':>11}")
+
+    concat_emails = args.emails if args.concat_emails is None else min(args.concat_emails, args.emails)
+    if concat_emails:
+        subset = make_sites(random.Random(args.seed), concat_emails, args.per_site)
+        start = time.perf_counter()
+        df = concat_per_email(subset)
+        seconds = time.perf_counter() - start
+        same = same_rows(df, columnar(subset))
+        print(f"{'pd.concat per email':<28}{len(df):>9}{seconds:>10.3f}{'-':>10}{'yes' if same else 'NO':>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def stream():
+            report = EmailReport(tmp, "stream")
+            for website, emails in sites:
+                report.add(website, emails)
+            return report.save()
+        path, seconds, peak = measure(stream)
+        same = same_rows(pd.read_csv(path), expected)
+        print(f"{'stream to CSV':<28}{args.emails:>9}{seconds:>10.3f}{peak:>10.1f}{'yes' if same else 'NO':>11}")
+
+        # Per-domain files: pandas DataFrame.to_csv against the chunked csv writer
+        def per_domain(write):
+            for n, (website, emails) in enumerate(sites):
+                write(os.path.join(tmp, f"{n}.csv"), emails)
+        _, pandas_seconds, _ = measure(per_domain, lambda path, emails: pd.DataFrame(emails, columns=['Email']).to_csv(path, index=False))
+        with open(os.path.join(tmp, "0.csv"), "rb") as f:
+            pandas_bytes = f.read()
+        _, csv_seconds, _ = measure(per_domain, write_email_csv)
+        with open(os.path.join(tmp, "0.csv"), "rb") as f:
+            same = f.read() == pandas_bytes
+        print(f"\nPer-domain CSVs ({len(sites)} files): DataFrame.to_csv {pandas_seconds:.3f}s, "
+              f"write_email_csv {csv_seconds:.3f}s, same bytes: {'yes' if same else 'NO'}")
+
+if __name__ == "__main__":
+    main()
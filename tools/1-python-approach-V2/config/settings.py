@@ -1,7 +1,41 @@
 import os
+from core.util.functions.env import env
 
 # Define the output directory for CSV files
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "exports", "1-python-approach")
 
 # Ensure the output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Crawl order: "priority" fetches contact/about-style pages first, "bfs" is plain breadth-first
+FRONTIER_MODE = env("FRONTIER", "priority").lower()
+
+# Keyword weights matched against link paths and anchor text, minus a penalty per level
+FRONTIER_KEYWORDS = {
+    "contact": 10,
+    "enquir": 8,
+    "inquir": 8,
+    "about": 6,
+    "career": 4,
+    "job": 3,
+    "team": 3,
+    "reach": 3,
+    "office": 2,
+    "location": 2,
+}
+FRONTIER_DEPTH_PENALTY = 1
+
+# Cap on queued URLs per site (0 = unlimited) so link-heavy sites cannot balloon memory
+FRONTIER_MAX_SIZE = int(env("FRONTIER_MAX_SIZE", 100000))
+
+# Index of URLs already queued or visited: "fingerprint" (64-bit hashes, ~20 bytes/URL),
+# "bloom" (~3 bytes/URL, may skip VISITED_FALSE_POSITIVE_RATE of new pages) or "set" (full keys)
+VISITED_INDEX = env("VISITED_INDEX", "fingerprint").lower()
+VISITED_FALSE_POSITIVE_RATE = float(env("VISITED_FALSE_POSITIVE_RATE", 0.001))
+
+# Page parser: "auto" (lxml if installed, else the stdlib tokenizer), "htmlparser", "lxml" or "bs4"
+HTML_EXTRACTOR = env("HTML_EXTRACTOR", "auto").lower()
+
+# Consolidated report: "memory" builds it once and saves all_emails_consolidated.xlsx,
+# "stream" appends each site to all_emails_consolidated.csv as it finishes
+REPORT_MODE = env("REPORT_MODE", "memory").lower()
@@ -0,0 +1,72 @@
+import os
+import csv
+import pandas as pd
+
+REPORT_COLUMNS = ['Website', 'Email']
+REPORT_MODES = ("memory", "stream")
+
+
+def write_email_csv(filepath, emails, chunk_size=10000):
+    """Write one site's emails as an 'Email' column CSV, byte-for-byte what DataFrame.to_csv(index=False) gives."""
+    with open(filepath, "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(['Email'])
+        for i in range(0, len(emails), chunk_size):
+            writer.writerows([email] for email in emails[i:i + chunk_size])
+
+
+class EmailReport:
+    """The consolidated Website/Email report for every scraped site.
+
+    "memory" keeps one list per column and builds the DataFrame once in
+    save(), so adding a site costs only its own emails (pd.concat per email
+    copied the whole frame each time). "stream" appends each site's rows to
+    all_emails_consolidated.csv as soon as it is added, so memory stays flat
+    and finished sites are on disk even if the run dies; it writes CSV only,
+    since an xlsx file cannot be appended to.
+    """
+
+    def __init__(self, output_dir, mode="memory"):
+        if mode not in REPORT_MODES:
+            raise ValueError(f"Unknown report mode {mode!r}, expected one of {REPORT_MODES}")
+        self.mode = mode
+        self.xlsx_file = os.path.join(output_dir, "all_emails_consolidated.xlsx")
+        self.csv_file = os.path.join(output_dir, "all_emails_consolidated.csv")
+        self.columns = {name: [] for name in REPORT_COLUMNS}
+        self.count = 0
+        self._stream = None
+
+    def add(self, website, emails):
+        if self.mode == "stream":
+            if self._stream is None:
+                self._stream = open(self.csv_file, "w", newline='', encoding='utf-8')
+                self._writer = csv.writer(self._stream, lineterminator=os.linesep)
+                self._writer.writerow(REPORT_COLUMNS)
+            self._writer.writerows([website, email] for email in emails)
+            self._stream.flush()
+        else:
+            self.columns['Website'].extend([website] * len(emails))
+            self.columns['Email'].extend(emails)
+        self.count += len(emails)
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns, columns=REPORT_COLUMNS)
+
+    def save(self):
+        """Write the report; returns the path written, or None when there were no emails."""
+        if self.mode == "stream":
+            if self._stream is None:
+                return None
+            self._stream.close()
+            return self.csv_file
+        if not self.count:
+            return None
+        df = self.to_frame()
+        try:
+            df.to_excel(self.xlsx_file, index=False)
+            return self.xlsx_file
+        except Exception as e:
+            print(f"Error saving consolidated emails: {str(e)}")
+            # Try saving as CSV instead
+            df.to_csv(self.csv_file, index=False)
+            return self.csv_file
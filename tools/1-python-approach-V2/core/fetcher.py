@@ -0,0 +1,260 @@
+import os
+import time
+import socket
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError
+
+from core.util.functions.env import env
+from core.http_cache import HttpCache
+from core.politeness import PolitenessScheduler, Throttled, THROTTLE_STATUSES
+from core.dns_cache import DnsCache, NO_SUCH_NAME
+
+DEFAULT_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "cache", "http-cache.sqlite"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_stages = threading.local()
+
+
+def capture_stages():
+    """Collect this thread's request stage times (throttle, dns, connect, tls) into a new dict; returns it.
+
+    Nothing is timed on a thread that never called this.
+    """
+    _stages.current = {}
+    return _stages.current
+
+
+def _add_stage(stage, seconds):
+    stages = getattr(_stages, "current", None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+class FetchStats:
+    """Thread-safe counters for the fetcher, used to check connection reuse on a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "checkouts": 0, "new_connections": 0, "errors": 0}
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        # Every checkout that did not open a socket got a kept-alive one from the pool
+        counts["reused_connections"] = max(counts["checkouts"] - counts["new_connections"], 0)
+        return counts
+
+    def summary(self):
+        c = self.snapshot()
+        return (f"HTTP: {c['requests']} requests, {c['new_connections']} new connections, "
+                f"{c['reused_connections']} reused, {c['errors']} errors")
+
+
+def _bool(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class FailFastRetry(Retry):
+    """Retry that gives up at once when the name does not exist; a resolver that timed out (EAI_AGAIN) is retried."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if (isinstance(error, NewConnectionError) and isinstance(error.__cause__, socket.gaierror)
+                and error.__cause__.errno in NO_SUCH_NAME):
+            raise MaxRetryError(_pool, url, error) from error
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _resolving_connection(base, dns):
+    """Subclass a urllib3 connection so its socket comes from DnsCache.connect()."""
+
+    class ResolvingConnection(base):
+        def connect(self):
+            stages = getattr(_stages, "current", None)
+            if stages is None or not issubclass(base, HTTPSConnection):
+                return super().connect()
+            # The handshake is whatever connect() spends beyond _new_conn()
+            start = time.monotonic()
+            before = stages.get("dns", 0.0) + stages.get("connect", 0.0)
+            super().connect()
+            socket_time = stages.get("dns", 0.0) + stages.get("connect", 0.0) - before
+            _add_stage("tls", time.monotonic() - start - socket_time)
+
+        def _new_conn(self):
+            # Same error mapping as urllib3's own _new_conn, so retries treat failures alike
+            try:
+                return dns.connect((self._dns_host, self.port), self.timeout, source_address=self.source_address,
+                                   socket_options=self.socket_options, stages=getattr(_stages, "current", None))
+            except socket.gaierror as e:
+                raise NewConnectionError(self, f"Failed to resolve {self.host}: {e}") from e
+            except socket.timeout as e:
+                raise ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from e
+            except OSError as e:
+                raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+    return ResolvingConnection
+
+
+def _counting_pool(base, stats, connection_cls=None):
+    """Subclass a urllib3 pool so checkouts and new sockets are counted."""
+
+    class CountingPool(base):
+        if connection_cls is not None:
+            ConnectionCls = connection_cls
+
+        def _get_conn(self, timeout=None):
+            stats.count("checkouts")
+            return super()._get_conn(timeout=timeout)
+
+        def _new_conn(self):
+            stats.count("new_connections")
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools report into a FetchStats and connect through a DnsCache."""
+
+    def __init__(self, stats, dns=None, **kwargs):
+        self.stats = stats
+        self.dns = dns
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        http_cls = _resolving_connection(HTTPConnection, self.dns) if self.dns else None
+        https_cls = _resolving_connection(HTTPSConnection, self.dns) if self.dns else None
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats, http_cls),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats, https_cls),
+        }
+
+
+class Fetcher:
+    """Shared keep-alive session: one connection pool per host, retries with backoff.
+
+    Settings come from .env:
+        REQUEST_TIMEOUT   seconds per request (default 10)
+        HTTP_POOL_HOSTS   hosts whose pools are kept open (default 64)
+        HTTP_POOL_SIZE    kept-alive connections per host, also the per-host cap (default 10)
+        HTTP_RETRIES      retries on connection errors and 429/5xx (default 2)
+        HTTP_BACKOFF      backoff factor between retries in seconds (default 0.5)
+        HTTP_CACHE        keep page bodies between runs, see core/http_cache.py (default false)
+        HTTP_CACHE_PATH   cache file (default cache/http-cache.sqlite in the tool folder)
+        HTTP_CACHE_TTL    seconds a cached page is used without revalidating (default 86400)
+        HTTP_CACHE_MAX_MB size the cache is trimmed to, least recently used first (default 500)
+        HTTP_POLITENESS   per-host adaptive rate limit, see core/politeness.py (default true)
+        HTTP_HOST_RATE    starting requests/s per host (default 5), HTTP_HOST_MIN_RATE / HTTP_HOST_MAX_RATE
+                          bound it (default 0.2 / 20), HTTP_HOST_BURST requests may start at once (default 5)
+        DNS_CACHE         cache lookups and race IPv6/IPv4 connects, see core/dns_cache.py (default true)
+        DNS_CACHE_TTL     seconds an answer is kept (default 300), DNS_NEGATIVE_TTL for names that
+                          do not exist (default 60), HAPPY_EYEBALLS_DELAY between attempts (default 0.25)
+    """
+
+    def __init__(self, timeout=None, pool_hosts=None, pool_size=None, retries=None, backoff=None, headers=None, cache=None,
+                 scheduler=None, dns=None):
+        self.timeout = timeout if timeout is not None else float(env("REQUEST_TIMEOUT", 10))
+        pool_hosts = pool_hosts if pool_hosts is not None else int(env("HTTP_POOL_HOSTS", 64))
+        pool_size = pool_size if pool_size is not None else int(env("HTTP_POOL_SIZE", 10))
+        retries = retries if retries is not None else int(env("HTTP_RETRIES", 2))
+        backoff = backoff if backoff is not None else float(env("HTTP_BACKOFF", 0.5))
+
+        self.stats = FetchStats()
+        if scheduler is None and _bool(env("HTTP_POLITENESS", "true")):
+            scheduler = PolitenessScheduler(rate=float(env("HTTP_HOST_RATE", 5)),
+                                            min_rate=float(env("HTTP_HOST_MIN_RATE", 0.2)),
+                                            max_rate=float(env("HTTP_HOST_MAX_RATE", 20)),
+                                            burst=int(env("HTTP_HOST_BURST", 5)))
+        self.scheduler = scheduler or None
+        self.retries = retries
+        # With a scheduler, 429/503 are retried here so the whole host slows down, not just one thread
+        statuses = [s for s in RETRY_STATUSES if not (self.scheduler and s in THROTTLE_STATUSES)]
+        if dns is None and _bool(env("DNS_CACHE", "true")):
+            dns = DnsCache(ttl=float(env("DNS_CACHE_TTL", 300)), negative_ttl=float(env("DNS_NEGATIVE_TTL", 60)),
+                           attempt_delay=float(env("HAPPY_EYEBALLS_DELAY", 0.25)))
+        self.dns = dns or None
+        retry_cls = FailFastRetry if self.dns else Retry
+        retry = retry_cls(total=retries, backoff_factor=backoff, status_forcelist=statuses,
+                          allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False,
+                          respect_retry_after_header=not self.scheduler)
+        # pool_block keeps each host at pool_size connections instead of opening throwaway ones
+        adapter = PooledAdapter(self.stats, self.dns, pool_connections=pool_hosts, pool_maxsize=pool_size,
+                                max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        if cache is None and _bool(env("HTTP_CACHE", "false")):
+            cache = HttpCache(env("HTTP_CACHE_PATH", DEFAULT_CACHE_PATH), ttl=float(env("HTTP_CACHE_TTL", 86400)),
+                              max_bytes=int(float(env("HTTP_CACHE_MAX_MB", 500)) * 1024 * 1024))
+        self.cache = cache or None
+
+    def get(self, url, cached=True, **kwargs):
+        """GET `url`, through HTTP_CACHE if it is on and `cached`."""
+        kwargs.setdefault("timeout", self.timeout)
+        self.stats.count("requests")
+        try:
+            if self.cache and cached:
+                return self.cache.get(self, url, **kwargs)
+            return self.request(url, **kwargs)
+        except Exception:
+            self.stats.count("errors")
+            raise
+
+    def request(self, url, reserved=False, **kwargs):
+        """GET over the network, paced by the scheduler when there is one.
+
+        `reserved` means the caller already waited for the scheduler (reserve() and start());
+        a 429/503 then raises Throttled for the caller to wait out and retry, instead of
+        sleeping in this thread.
+        """
+        if not self.scheduler:
+            return self.session.get(url, **kwargs)
+        for attempt in range(self.retries + 1):
+            start = time.monotonic()
+            if not reserved:
+                self.scheduler.acquire(url)
+                _add_stage("throttle", time.monotonic() - start)
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except Exception:
+                self.scheduler.record(url, None, time.monotonic() - start)
+                raise
+            self.scheduler.record(url, response.status_code, time.monotonic() - start, response.headers.get("Retry-After"))
+            if response.status_code not in THROTTLE_STATUSES or (attempt == self.retries and not reserved):
+                return response
+            response.close()
+            if reserved:
+                raise Throttled(f"{url} answered {response.status_code}")
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide Fetcher, creating it from .env on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Fetcher()
+        return _shared
@@ -0,0 +1,189 @@
+import string
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+from core.util.functions.email_extractor import EMAIL_PATTERN
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the stdlib tokenizer is used without it
+    etree = None
+
+# Every character EMAIL_PATTERN can match; a match never spans anything else
+EMAIL_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-@")
+
+
+class EmailScanner:
+    """Incremental EMAIL_PATTERN scan; finds the same matches as one findall over the whole text"""
+
+    def __init__(self):
+        self.emails = []
+        self._carry = ""
+
+    def feed(self, chunk):
+        buf = self._carry + chunk
+        # Scan up to the last character that cannot be part of an email
+        end = len(buf)
+        while end > 0 and buf[end - 1] in EMAIL_CHARS:
+            end -= 1
+        if end == 0:
+            self._carry = buf
+            return
+        self.emails.extend(EMAIL_PATTERN.findall(buf, 0, end))
+        # Keep that character too, so \b sees the same neighbour on the next scan
+        self._carry = buf[end - 1:]
+
+    def close(self):
+        self.emails.extend(EMAIL_PATTERN.findall(self._carry))
+        self._carry = ""
+        return self.emails
+
+
+class LinkCollector:
+    """Collects (href, anchor text) for every <a href>, in document order.
+
+    Works as an lxml parser target and is driven by HTMLParserExtractor. Anchor
+    text matches BeautifulSoup's get_text(" ", strip=True).
+    """
+
+    def __init__(self):
+        self.links = []  # [href, [text parts]]
+        self._open = []  # anchors whose text is still being collected
+        self._text = []  # pieces of the current text node, which may arrive split
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag == "a" and "href" in attrib:
+            link = [attrib["href"] or "", []]
+            self.links.append(link)
+            self._open.append(link)
+        elif tag == "a":
+            self._open.append(None)
+
+    def end(self, tag):
+        self._flush()
+        if tag == "a" and self._open:
+            self._open.pop()
+
+    def data(self, data):
+        if self._open:
+            self._text.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return [(href, " ".join(parts)) for href, parts in self.links]
+
+    def _flush(self):
+        text = "".join(self._text).strip()
+        self._text = []
+        if text:
+            for link in self._open:
+                if link is not None:
+                    link[1].append(text)
+
+
+class HTMLParserExtractor(HTMLParser):
+    """Stdlib tokenizer: links and email candidates in one pass, fed in chunks"""
+
+    name = "htmlparser"
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._links = LinkCollector()
+        self._emails = EmailScanner()
+
+    def feed(self, chunk):
+        self._emails.feed(chunk)
+        super().feed(chunk)
+
+    def close(self):
+        super().close()
+        return self._links.close(), self._emails.close()
+
+    def handle_starttag(self, tag, attrs):
+        # Like BeautifulSoup, the last of duplicated attributes wins
+        self._links.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self._links.end(tag)
+
+    def handle_data(self, data):
+        self._links.data(data)
+
+    def handle_comment(self, data):
+        self._links.comment(data)
+
+
+class LxmlExtractor:
+    """libxml2 tokenizer through lxml's feed parser; same output as HTMLParserExtractor"""
+
+    name = "lxml"
+
+    def __init__(self):
+        self._links = LinkCollector()
+        self._emails = EmailScanner()
+        self._parser = etree.HTMLParser(target=self._links)
+
+    def feed(self, chunk):
+        self._emails.feed(chunk)
+        self._parser.feed(chunk)
+
+    def close(self):
+        try:
+            links = self._parser.close()
+        except etree.XMLSyntaxError:  # e.g. an empty document
+            links = self._links.close()
+        return links, self._emails.close()
+
+
+class BeautifulSoupExtractor:
+    """The original two-pass path: a full BeautifulSoup tree plus a regex over the raw text"""
+
+    name = "bs4"
+
+    def __init__(self):
+        self._chunks = []
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+
+    def close(self):
+        text = "".join(self._chunks)
+        soup = BeautifulSoup(text, 'html.parser')
+        links = [(a_tag['href'], a_tag.get_text(" ", strip=True)) for a_tag in soup.find_all('a', href=True)]
+        return links, EMAIL_PATTERN.findall(text)
+
+
+EXTRACTORS = {
+    "htmlparser": HTMLParserExtractor,
+    "lxml": LxmlExtractor,
+    "bs4": BeautifulSoupExtractor,
+}
+
+
+def get_extractor(name="auto"):
+    """
+    Create a page extractor
+
+    Args:
+        name: "htmlparser", "lxml", "bs4", or "auto" (lxml if installed, else htmlparser)
+
+    Returns:
+        Object with feed(chunk) and close() -> (links, email candidates)
+    """
+    if name == "auto":
+        name = "lxml" if etree is not None else "htmlparser"
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor {name!r}, expected auto or one of {list(EXTRACTORS)}")
+    if name == "lxml" and etree is None:
+        raise ValueError("HTML extractor 'lxml' needs the lxml package")
+    return EXTRACTORS[name]()
+
+
+def extract_page(text, name="auto"):
+    """Return ([(href, anchor text)], [email candidates]) for one page"""
+    extractor = get_extractor(name)
+    extractor.feed(text)
+    return extractor.close()
@@ -0,0 +1,135 @@
+import time
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 300  # never park a host longer than this, whatever the server asks
+
+
+class Throttled(Exception):
+    """A 429/503 for a request whose start time was reserve()d by the caller, to be retried there."""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class HostRate:
+    """Token bucket of one host, kept as the time the next request may start."""
+
+    def __init__(self, rate, now):
+        self.rate = rate
+        self.next_at = now  # theoretical time of the next request
+        self.blocked_until = 0.0
+        self.latency = None  # moving average of response times
+        self.requests = 0
+        self.throttled = 0
+
+
+class PolitenessScheduler:
+    """Per-host request rate that adapts to how the host is coping.
+
+    Each host gets a token bucket of `burst` requests refilled at its rate,
+    which starts at `rate` requests/s. Healthy responses raise the rate
+    additively (about +1 request/s per second of traffic) up to `max_rate`.
+    429 and 503 halve it and park the host for its Retry-After; a response
+    much slower than the host's average, or a failed request, cuts it by a
+    quarter. The rate never drops below `min_rate`.
+
+    acquire() blocks the calling thread until its request may start, so every
+    thread fetching from a host shares that host's budget. An event loop calls
+    reserve() and start() itself and awaits the wait, so no thread or
+    connection slot is held while a host is paced or parked.
+    """
+
+    def __init__(self, rate=5.0, min_rate=0.2, max_rate=20.0, burst=5, spike_factor=3.0):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1, burst)
+        self.spike_factor = spike_factor
+        self.hosts = {}
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _host(self, url, now):
+        host = urlsplit(url).netloc.lower()
+        if host not in self.hosts:
+            self.hosts[host] = HostRate(self.initial_rate, now)
+        return self.hosts[host]
+
+    def _start_time(self, h, now):
+        # Up to `burst` requests may start back to back before the rate applies
+        tolerance = (self.burst - 1) / h.rate
+        return max(now, h.next_at - tolerance, h.blocked_until)
+
+    def reserve(self, url):
+        """Reserve the next start time on `url`'s host; returns the seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            h = self._host(url, now)
+            start = self._start_time(h, now)
+            h.next_at = max(h.next_at, start) + 1 / h.rate
+            wait = max(start - now, 0.0)
+            self.waited += wait
+        return wait
+
+    def start(self, url):
+        """Count a request to `url` after its reserve()d wait; False if a 429/503 parked the host meanwhile."""
+        with self._lock:
+            h = self._host(url, time.monotonic())
+            if h.blocked_until > time.monotonic():
+                return False
+            h.requests += 1
+            return True
+
+    def acquire(self, url):
+        """Reserve the next start time on `url`'s host and sleep until then."""
+        while True:
+            wait = self.reserve(url)
+            if wait > 0:
+                time.sleep(wait)
+            if self.start(url):
+                return
+
+    def record(self, url, status, latency, retry_after=None):
+        """Adjust the host's rate from a response (`status` None for a failed request)."""
+        with self._lock:
+            now = time.monotonic()
+            h = self._host(url, now)
+            if status in THROTTLE_STATUSES:
+                h.throttled += 1
+                h.rate = max(self.min_rate, h.rate / 2)
+                pause = parse_retry_after(retry_after)
+                h.blocked_until = max(h.blocked_until, now + min(pause if pause is not None else 1 / h.rate, MAX_RETRY_AFTER))
+                return
+            spike = h.latency is not None and latency > self.spike_factor * h.latency and latency > 1.0
+            h.latency = latency if h.latency is None else 0.9 * h.latency + 0.1 * latency
+            if status is None or spike:
+                h.rate = max(self.min_rate, h.rate * 0.75)
+            else:
+                h.rate = min(self.max_rate, h.rate + 1 / h.rate)
+
+    def summary(self):
+        with self._lock:
+            hosts = list(self.hosts.values())
+            waited = self.waited
+        if not hosts:
+            return "Politeness: no requests"
+        rates = [h.rate for h in hosts]
+        return (f"Politeness: {len(hosts)} hosts, {sum(h.throttled for h in hosts)} throttled responses (429/503), "
+                f"{waited:.1f}s waited in total, rate {min(rates):.1f}-{max(rates):.1f} req/s per host")
@@ -1,15 +1,22 @@
 import re
 import time
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
-from core.util.functions.email_extractor import extract_emails
+from core.util.functions.email_extractor import filter_emails
+from core.page_extractor import extract_page
+from core.fetcher import get_fetcher
+from core.util.functions.canonical_url import canonicalize_url, url_key
+from core.frontier import Frontier
+from core.visited_index import FingerprintSet
+from config.settings import FRONTIER_MODE, FRONTIER_KEYWORDS, FRONTIER_DEPTH_PENALTY, FRONTIER_MAX_SIZE, HTML_EXTRACTOR
+from config.settings import VISITED_INDEX, VISITED_FALSE_POSITIVE_RATE
 
 class EmailScraper:
     def __init__(self, base_url):
         self.base_url = self._normalize_url(base_url)
         self.domain = self._extract_domain(self.base_url)
-        self.visited_urls = set()
+        self.frontier = None  # set per scrape_with_thresholds() run
+        self.url_variants = FingerprintSet()  # raw link forms seen
+        self.skipped_variants = 0
         self.emails = set()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -24,7 +31,8 @@ class EmailScraper:
     def _extract_domain(self, url):
         """Extract domain from URL"""
         parsed_url = urlparse(url)
-        domain = parsed_url.netloc
+        # Host only: an address like info@example.com never carries the :port of the site URL
+        domain = parsed_url.hostname or ""
         # Remove www. if present
         if domain.startswith('www.'):
             domain = domain[4:]
@@ -39,16 +47,26 @@ class EmailScraper:
         parsed_url = urlparse(url)
         return bool(parsed_url.netloc) and self.domain in parsed_url.netloc
     
-    def _get_links(self, soup, current_url):
-        """Extract all links from the page"""
+    def _get_links(self, page_links, current_url):
+        """Resolve the page's (href, anchor text) pairs, keeping same-site links"""
         links = []
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
+        for href, anchor_text in page_links:
             full_url = urljoin(current_url, href)
-            if self._is_valid_url(full_url) and full_url not in self.visited_urls:
-                links.append(full_url)
+            if self._is_valid_url(full_url):
+                links.append((full_url, anchor_text))
         return links
     
+    def _enqueue_links(self, links, level):
+        """Queue links whose page is not already queued or visited"""
+        for full_url, anchor_text in links:
+            key = url_key(full_url)
+            new_variant = self.url_variants.add(full_url)
+            if key not in self.frontier:
+                self.frontier.push(canonicalize_url(full_url), level, anchor_text, key=key)
+            elif new_variant:
+                # Fragment/scheme/www/slash variant of a page already found
+                self.skipped_variants += 1
+    
     def scrape_with_thresholds(self, email_threshold, timeout_seconds):
         """
         Scrape website for emails with thresholds
@@ -61,33 +79,33 @@ class EmailScraper:
             List of found emails
         """
         start_time = time.time()
-        urls_to_visit = [self.base_url]
+        self.frontier = frontier = Frontier(FRONTIER_MODE, FRONTIER_KEYWORDS, FRONTIER_DEPTH_PENALTY, FRONTIER_MAX_SIZE,
+                                            VISITED_INDEX, VISITED_FALSE_POSITIVE_RATE)
+        frontier.push(self.base_url, 0, key=url_key(self.base_url))
+        pages_fetched = 0
         
-        while urls_to_visit and len(self.emails) < email_threshold:
+        while frontier and len(self.emails) < email_threshold:
             # Check timeout
             if time.time() - start_time > timeout_seconds:
                 print(f"Timeout reached after {timeout_seconds} seconds")
                 break
                 
             # Get next URL
-            current_url = urls_to_visit.pop(0)
-            if current_url in self.visited_urls:
-                continue
-                
+            current_url, level = frontier.pop()
             print(f"Scraping: {current_url}")
-            self.visited_urls.add(current_url)
             
             try:
                 # Fetch page
-                response = requests.get(current_url, headers=self.headers, timeout=10)
+                response = get_fetcher().get(current_url, headers=self.headers, timeout=10)
                 if response.status_code != 200:
                     continue
+                pages_fetched += 1
                     
-                # Parse HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
+                # Extract links and email candidates in one pass over the page
+                page_links, candidates = extract_page(response.text, HTML_EXTRACTOR)
                 
                 # Extract emails
-                page_emails = extract_emails(response.text, self.domain)
+                page_emails = filter_emails(candidates, self.domain)
                 self.emails.update(page_emails)
                 
                 # Print progress
@@ -96,15 +114,18 @@ class EmailScraper:
                 
                 # Check if we've reached the threshold
                 if len(self.emails) >= email_threshold:
-                    print(f"Email threshold reached: {email_threshold}")
+                    print(f"Email threshold reached: {email_threshold} after {pages_fetched} pages ({FRONTIER_MODE} frontier)")
                     break
                 
                 # Get more links to visit
-                new_links = self._get_links(soup, current_url)
-                urls_to_visit.extend(new_links)
+                self._enqueue_links(self._get_links(page_links, current_url), level + 1)
                 
             except Exception as e:
                 print(f"Error processing {current_url}: {str(e)}")
         
+        if self.skipped_variants:
+            print(f"Skipped {self.skipped_variants} duplicate URL variants")
+        print(f"Frontier: {frontier.summary()}")
+        
         # Return list of emails
         return list(self.emails)
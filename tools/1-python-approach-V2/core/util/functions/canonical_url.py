@@ -0,0 +1,39 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query params that only carry campaign/click tracking and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "ref_src"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def _is_tracking(param):
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+def _netloc(parts):
+    """Lowercase host with the port kept only when it is not the scheme's default."""
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return host if port is None or DEFAULT_PORTS.get(parts.scheme.lower()) == port else f"{host}:{port}"
+
+def canonicalize_url(url):
+    """Return a fetchable form of `url`: no fragment or tracking params, lowercase host, sorted query."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)))
+    return urlunsplit((parts.scheme.lower(), _netloc(parts), parts.path or "/", query, ""))
+
+def site_host(url):
+    """Host of `url` used for same-site checks: canonical netloc without a leading www."""
+    netloc = _netloc(urlsplit(url.strip()))
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+def url_key(url):
+    """Dedup key: http/https, www/bare host and trailing-slash variants of a page map to one key."""
+    canonical = canonicalize_url(url)
+    parts = urlsplit(canonical)
+    path = parts.path.rstrip("/") or "/"
+    return site_host(canonical) + path + ("?" + parts.query if parts.query else "")
@@ -1,4 +1,14 @@
 import re
+from core.email_filter import EmailFilter
+
+# Improved regex pattern to match only valid email addresses
+# This pattern avoids matching file extensions like .png, .jpg, etc.
+EMAIL_PATTERN = re.compile(r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b')
+
+# Usernames of generic (not personal) emails, compiled once into a single regex
+GENERIC_USERNAMES = ['info', 'sales', 'admin', 'contact', 'support', 'hello', 'help', 'office', 'mail',
+                     'enquiry', 'enquiries', 'general', 'hr', 'jobs', 'careers']
+GENERIC_FILTER = EmailFilter(GENERIC_USERNAMES)
 
 def extract_emails(text, domain=None):
     """
@@ -11,23 +21,25 @@ def extract_emails(text, domain=None):
     Returns:
         List of email addresses
     """
-    # Improved regex pattern to match only valid email addresses
-    # This pattern avoids matching file extensions like .png, .jpg, etc.
-    email_pattern = r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b'
-    
     # Find all matches
-    emails = re.findall(email_pattern, text)
+    return filter_emails(EMAIL_PATTERN.findall(text), domain)
+
+def filter_emails(emails, domain=None):
+    """
+    Keep only generic emails from a list of candidates
     
+    Args:
+        emails: Email candidates, e.g. EMAIL_PATTERN matches
+        domain: If provided, only return emails from this domain
+        
+    Returns:
+        List of email addresses
+    """
     # Filter out non-generic emails (personal emails)
     generic_emails = []
     for email in emails:
-        # Extract username part (before @)
-        username = email.split('@')[0].lower()
-        
         # Check if it's a generic email (not personal)
-        if any(generic in username for generic in ['info', 'sales', 'admin', 'contact', 'support', 
-                                                 'hello', 'help', 'office', 'mail', 'enquiry', 
-                                                 'enquiries', 'general', 'hr', 'jobs', 'careers']):
+        if GENERIC_FILTER.is_valid(email):
             # If domain is specified, only include emails from that domain
             if domain:
                 if domain in email.split('@')[1]:
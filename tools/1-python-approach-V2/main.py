@@ -7,7 +7,9 @@ import traceback
 import argparse
 from datetime import datetime
 from core.scraper import EmailScraper
-from config.settings import OUTPUT_DIR
+from core.fetcher import get_fetcher
+from core.email_report import EmailReport, write_email_csv
+from config.settings import OUTPUT_DIR, REPORT_MODE
 
 def signal_handler(sig, frame):
     print("\nScraping stopped by user. Saving results...")
@@ -57,8 +59,8 @@ def main():
         if 'Results File' not in df.columns:
             df['Results File'] = ""
         
-        # Create a consolidated DataFrame for all emails
-        all_emails_df = pd.DataFrame(columns=['Website', 'Email'])
+        # Consolidated report of all emails, built once at the end (or streamed, see REPORT_MODE)
+        report = EmailReport(os.path.dirname(input_file), REPORT_MODE)
         
         # Process each website
         for index, row in df.iterrows():
@@ -99,15 +101,13 @@ def main():
                 os.makedirs(OUTPUT_DIR, exist_ok=True)
                 
                 # Save to CSV
-                email_df = pd.DataFrame(emails, columns=['Email'])
-                email_df.to_csv(filepath, index=False)
+                write_email_csv(filepath, emails)
                 
                 # Update the Excel file
                 df.at[index, 'Results File'] = filename
                 
-                # Add to consolidated DataFrame
-                for email in emails:
-                    all_emails_df = pd.concat([all_emails_df, pd.DataFrame({'Website': [website], 'Email': [email]})], ignore_index=True)
+                # Add to consolidated report
+                report.add(website, emails)
                 
                 print(f"Found {len(emails)} emails. Saved to {filepath}")
             else:
@@ -125,17 +125,17 @@ def main():
             print(f"Saved results to new file: {results_file}")
         
         # Save consolidated emails
-        if not all_emails_df.empty:
-            consolidated_file = os.path.join(os.path.dirname(input_file), "all_emails_consolidated.xlsx")
-            try:
-                all_emails_df.to_excel(consolidated_file, index=False)
-                print(f"Saved consolidated emails to {consolidated_file}")
-            except Exception as e:
-                print(f"Error saving consolidated emails: {str(e)}")
-                # Try saving as CSV instead
-                csv_file = os.path.join(os.path.dirname(input_file), "all_emails_consolidated.csv")
-                all_emails_df.to_csv(csv_file, index=False)
-                print(f"Saved consolidated emails as CSV: {csv_file}")
+        consolidated_file = report.save()
+        if consolidated_file:
+            print(f"Saved consolidated emails to {consolidated_file}")
+
+        print(get_fetcher().stats.summary())
+        if get_fetcher().cache:
+            print(get_fetcher().cache.stats.summary())
+        if get_fetcher().scheduler:
+            print(get_fetcher().scheduler.summary())
+        if get_fetcher().dns:
+            print(get_fetcher().dns.stats.summary())
     except Exception as e:
         print(f"Error during execution: {str(e)}")
         traceback.print_exc()
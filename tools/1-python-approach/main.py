@@ -24,6 +24,10 @@ queue.append((url, 0))
 # Improved regex
 EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
 
+# Read once, not per URL
+DEBUG_LEVEL = int(env("DEBUG_LEVEL", 1))
+REQUEST_TIMEOUT = int(env("REQUEST_TIMEOUT", 5))
+
 # Known valid page extensions
 VALID_PAGE_EXTENSIONS = {
   '', '.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.jspx', '.cfm', '.cgi', '.pl', '.xhtml', '.shtml'
@@ -33,7 +37,7 @@ def should_skip(url):
   path = urlparse(url).path.lower()
   ext = os.path.splitext(path)[1]
   if ext not in VALID_PAGE_EXTENSIONS:
-    if int(env("DEBUG_LEVEL", 1)) >= 2:
+    if DEBUG_LEVEL >= 2:
       debug(f"Skipping URL (non-page file): {url}")
     return True
   return False
@@ -61,9 +65,9 @@ try:
       continue
 
     try:
-      r = requests.get(current_url, timeout=int(env("REQUEST_TIMEOUT", 5)))
+      r = requests.get(current_url, timeout=REQUEST_TIMEOUT)
       text_content = r.text
-      if int(env("DEBUG_LEVEL", 1)) >= 2:
+      if DEBUG_LEVEL >= 2:
         debug(f"Response from {current_url}:\n{text_content}")
     except Exception as e:
       debug(f"Failed to fetch {current_url}: {e}")
@@ -0,0 +1,50 @@
+import re
+
+
+def _contains_any(words):
+    return "(?:" + "|".join(re.escape(w) for w in words) + ")"
+
+
+def _length(char_class, low, high):
+    # 0 means no limit, as in config.json
+    return f"{char_class}{{{low or 0},{high or ''}}}"
+
+
+class EmailFilter:
+    """Email rules compiled once into a single regex, so each candidate is checked in one match.
+
+    An address is kept when its username (the part before "@", lowercased)
+    contains one of `targets` and none of `do_not_allow`, and the username and
+    domain lengths are within the min/max limits (0 = no limit). As with the
+    old any() checks, an empty target list keeps nothing.
+    """
+
+    def __init__(self, targets, do_not_allow=(), min_username_length=0, max_username_length=0,
+                 min_domain_length=0, max_domain_length=0):
+        targets = [t for t in targets if t]
+        do_not_allow = [x for x in do_not_allow if x]
+        parts = ["(?=[^@]*" + _contains_any(targets) + ")" if targets else "(?!)"]
+        if do_not_allow:
+            parts.append("(?![^@]*" + _contains_any(do_not_allow) + ")")
+        parts.append(_length("[^@]", min_username_length, max_username_length) + "@")
+        parts.append(_length(".", min_domain_length, max_domain_length) + r"\Z")
+        self.pattern = re.compile("".join(parts), re.DOTALL)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build from the config.json keys."""
+        return cls(
+            config.get("target-usernames", []),
+            config.get("do-not-allow-in-username", []),
+            config.get("min-username-length", 0),
+            config.get("max-username-length", 0),
+            config.get("min-domain-length", 0),
+            config.get("max-domain-length", 0),
+        )
+
+    def is_valid(self, email):
+        # Only the username was lowercased before; lowercasing the domain does not change its length
+        return self.pattern.match(email.lower()) is not None
+
+    def filter(self, emails):
+        return [email for email in emails if self.is_valid(email)]
@@ -0,0 +1,120 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from core.util.functions.env import env
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchStats:
+    """Thread-safe counters for the fetcher, used to check connection reuse on a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "checkouts": 0, "new_connections": 0, "errors": 0}
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        # Every checkout that did not open a socket got a kept-alive one from the pool
+        counts["reused_connections"] = max(counts["checkouts"] - counts["new_connections"], 0)
+        return counts
+
+    def summary(self):
+        c = self.snapshot()
+        return (f"HTTP: {c['requests']} requests, {c['new_connections']} new connections, "
+                f"{c['reused_connections']} reused, {c['errors']} errors")
+
+
+def _counting_pool(base, stats):
+    """Subclass a urllib3 pool so checkouts and new sockets are counted."""
+
+    class CountingPool(base):
+        def _get_conn(self, timeout=None):
+            stats.count("checkouts")
+            return super()._get_conn(timeout=timeout)
+
+        def _new_conn(self):
+            stats.count("new_connections")
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools report into a FetchStats."""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+class Fetcher:
+    """Shared keep-alive session: one connection pool per host, retries with backoff.
+
+    Settings come from .env:
+        REQUEST_TIMEOUT   seconds per request (default 10)
+        HTTP_POOL_HOSTS   hosts whose pools are kept open (default 64)
+        HTTP_POOL_SIZE    kept-alive connections per host, also the per-host cap (default 10)
+        HTTP_RETRIES      retries on connection errors and 429/5xx (default 2)
+        HTTP_BACKOFF      backoff factor between retries in seconds (default 0.5)
+    """
+
+    def __init__(self, timeout=None, pool_hosts=None, pool_size=None, retries=None, backoff=None, headers=None):
+        self.timeout = timeout if timeout is not None else float(env("REQUEST_TIMEOUT", 10))
+        pool_hosts = pool_hosts if pool_hosts is not None else int(env("HTTP_POOL_HOSTS", 64))
+        pool_size = pool_size if pool_size is not None else int(env("HTTP_POOL_SIZE", 10))
+        retries = retries if retries is not None else int(env("HTTP_RETRIES", 2))
+        backoff = backoff if backoff is not None else float(env("HTTP_BACKOFF", 0.5))
+
+        self.stats = FetchStats()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+        # pool_block keeps each host at pool_size connections instead of opening throwaway ones
+        adapter = PooledAdapter(self.stats, pool_connections=pool_hosts, pool_maxsize=pool_size,
+                                max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        self.stats.count("requests")
+        try:
+            return self.session.get(url, **kwargs)
+        except Exception:
+            self.stats.count("errors")
+            raise
+
+    def close(self):
+        self.session.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide Fetcher, creating it from .env on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Fetcher()
+        return _shared
@@ -1,4 +1,4 @@
-import requests, re, csv, sys, os, time, json
+import re, csv, sys, os, time, json
 from urllib.parse import urljoin, urlparse
 from collections import deque, defaultdict
 from datetime import datetime
@@ -9,6 +9,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 from core.util.functions.debug import debug
 from core.util.functions.config import config
 from core.util.functions.env import env
+from core.fetcher import get_fetcher
+from core.email_filter import EmailFilter
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.normpath(os.path.join(CURRENT_DIR, "exports"))
@@ -18,6 +20,7 @@ EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
 VALID_PAGE_EXTENSIONS = { '', '.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.jspx', '.cfm', '.cgi', '.pl', '.xhtml', '.shtml' }
 
 DISABLE_TARGET_FILTER = env("DISABLE_TARGET_USERNAMES", "false").lower() == "true"
+DEBUG_LEVEL = int(env("DEBUG_LEVEL", 1))  # read once, not per page
 # TARGETS = config("target-usernames")
 # DO_NOT_ALLOW = config("do-not-allow-in-username")
 # EXCLUDE_EXTENSIONS = config("exclude-extensions")
@@ -25,8 +28,8 @@ DISABLE_TARGET_FILTER = env("DISABLE_TARGET_USERNAMES", "false").lower() == "tru
 with open(os.path.join(CURRENT_DIR, "config.json")) as f:
     CONFIG = json.load(f)
 
-TARGETS = CONFIG.get("target-usernames", [])
-DO_NOT_ALLOW = CONFIG.get("do-not-allow-in-username", [])
+# target-usernames, do-not-allow-in-username and the length limits, compiled once
+EMAIL_FILTER = EmailFilter.from_config(CONFIG)
 EXCLUDE_EXTENSIONS = CONFIG.get("exclude-extensions", [])
 
 def should_skip(url):
@@ -37,8 +40,7 @@ def should_skip(url):
 def is_valid_email(email):
     if DISABLE_TARGET_FILTER:
         return True
-    username = email.split('@')[0].lower()
-    return any(t in username for t in TARGETS) and not any(x in username for x in DO_NOT_ALLOW)
+    return EMAIL_FILTER.is_valid(email)
 
 def save_all_results(all_results):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -70,9 +72,9 @@ def crawl_site(website_url, email_threshold, timeout_minutes):
                 continue
             visited.add(current_url)
             try:
-                r = requests.get(current_url, timeout=10)
+                r = get_fetcher().get(current_url, timeout=10)
                 text = r.text
-                if int(env("DEBUG_LEVEL", 1)) >= 2:
+                if DEBUG_LEVEL >= 2:
                     debug(f"Fetched: {current_url}\n{text[:200]}")
             except Exception as e:
                 debug(f"Request failed: {current_url} -> {e}")
@@ -109,3 +111,4 @@ for idx, row in df.iterrows():
     all_results[website].extend(results)
 
 save_all_results(all_results)
+print(get_fetcher().stats.summary())
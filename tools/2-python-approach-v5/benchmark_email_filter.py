@@ -0,0 +1,61 @@
+import argparse, json, os, random, string, time
+from core.email_filter import EmailFilter
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def any_scan_filter(targets, do_not_allow):
+    """The per-candidate any() checks that EmailFilter replaces."""
+    def is_valid_email(email):
+        username = email.split('@')[0].lower()
+        return any(t in username for t in targets) and not any(x in username for x in do_not_allow)
+    return is_valid_email
+
+def make_corpus(rng, count, targets):
+    """Candidate addresses mixing target words, blocked characters and random names."""
+    words = list(targets) + ["contact", "john", "careers", "noreply", "office", "webmaster"]
+    corpus = []
+    for _ in range(count):
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+        if rng.random() < 0.5:
+            name = rng.choice([name + rng.choice(words), rng.choice(words) + name, rng.choice(words)])
+        if rng.random() < 0.2:
+            name = name[:2] + rng.choice("._-") + name[2:]
+        if rng.random() < 0.3:
+            name = name.upper()
+        domain = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 15)))
+        corpus.append(f"{name}@{domain}.{rng.choice(['com', 'ae', 'net', 'co.uk'])}")
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the compiled email filter with per-candidate any() scans')
+    parser.add_argument('--count', type=int, default=500000, help='Number of synthetic candidate addresses')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with open(os.path.join(CURRENT_DIR, "config.json")) as f:
+        config = json.load(f)
+    targets = config.get("target-usernames", [])
+    do_not_allow = config.get("do-not-allow-in-username", [])
+    corpus = make_corpus(random.Random(args.seed), args.count, targets)
+
+    # Length limits are left out: the old checks ignored them, so results would differ
+    candidates = [
+        ("any() scans", any_scan_filter(targets, do_not_allow)),
+        ("EmailFilter", EmailFilter(targets, do_not_allow).is_valid),
+    ]
+
+    print(f"{args.count} candidates, {len(targets)} targets, {len(do_not_allow)} blocked substrings\n")
+    print(f"{'Filter':<14}{'ns/candidate':>14}{'Kept':>10}{'Speedup':>10}")
+    expected = baseline = None
+    for name, is_valid in candidates:
+        start = time.perf_counter()
+        kept = [is_valid(email) for email in corpus]
+        ns = (time.perf_counter() - start) * 1e9 / args.count
+        expected = expected or kept
+        baseline = baseline or ns
+        print(f"{name:<14}{ns:>14.0f}{sum(kept):>10}{baseline / ns:>9.1f}x")
+        if kept != expected:
+            print("  -> results differ from the any() scans")
+
+if __name__ == "__main__":
+    main()
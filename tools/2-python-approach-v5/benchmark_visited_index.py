@@ -0,0 +1,67 @@
+import argparse, random, string, time, tracemalloc
+from core.util.functions.canonical_url import url_key
+from core.visited_index import make_visited_index
+
+FACETS = {"color": ["red", "blue", "black", "white", "green"], "size": ["s", "m", "l", "xl"],
+          "sort": ["price", "newest", "rating"], "brand": ["acme", "globex", "initech", "umbrella"]}
+
+def make_urls(rng, count):
+    """Faceted-search and calendar-trap URLs like the ones that blow up visited sets on large sites."""
+    urls = set()
+    while len(urls) < count:
+        if rng.random() < 0.3:
+            urls.add(f"https://www.example.com/events/calendar/{rng.randint(2000, 2040)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/")
+            continue
+        category = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        params = "&".join(f"{k}={rng.choice(v)}" for k, v in rng.sample(sorted(FACETS.items()), rng.randint(1, 4)))
+        urls.add(f"https://www.example.com/shop/{category}/?{params}&page={rng.randint(1, 200)}")
+    return [url_key(url) for url in urls]
+
+def build(name, keys, error_rate):
+    if name == "set[str]":
+        index = set()
+        for key in keys:
+            index.add(key.encode().decode())  # a fresh copy, as the crawler keeps its own string per URL
+        return index
+    index = make_visited_index(name, error_rate)
+    for key in keys:
+        index.add(key)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory per URL of the visited indexes')
+    parser.add_argument('--count', type=int, default=200000, help='Number of distinct synthetic URLs')
+    parser.add_argument('--error-rate', type=float, default=0.001, help='False positive rate of the Bloom filter')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = list(dict.fromkeys(make_urls(rng, args.count)))
+    # Keys never added, to measure false positives
+    unseen = list(dict.fromkeys(make_urls(random.Random(args.seed + 1), args.count // 4)).keys() - set(keys))
+
+    print(f"{len(keys)} URL keys, {sum(map(len, keys)) / len(keys):.0f} characters on average\n")
+    print(f"{'Index':<14}{'Bytes/URL':>12}{'vs set':>9}{'ns/add':>9}{'ns/lookup':>11}{'False pos.':>12}")
+    baseline = None
+    for name in ("set[str]", "fingerprint", "bloom"):
+        # The keys are built before tracing, so only what the index itself keeps is counted
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        index = build(name, keys, args.error_rate)
+        per_url = (tracemalloc.get_traced_memory()[0] - before) / len(keys)
+        tracemalloc.stop()
+        del index
+
+        # Timed again without tracemalloc, which slows every allocation down
+        start = time.perf_counter()
+        index = build(name, keys, args.error_rate)
+        add_ns = (time.perf_counter() - start) * 1e9 / len(keys)
+        start = time.perf_counter()
+        false_positives = sum(key in index for key in unseen)
+        lookup_ns = (time.perf_counter() - start) * 1e9 / max(len(unseen), 1)
+        baseline = baseline or per_url
+        print(f"{name:<14}{per_url:>12.1f}{baseline / per_url:>8.1f}x{add_ns:>9.0f}{lookup_ns:>11.0f}"
+              f"{false_positives / max(len(unseen), 1):>11.3%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import sys, os, json, importlib
+sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
+
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from dotenv import load_dotenv
+
+import config.app
+from core.util.functions.env import env
+from core.email_filter import EmailFilter
+
+CONFIG_FILE = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "config.json"))
+
+
+def _bool(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _workers(value):
+    return (os.cpu_count() or 1) if str(value).strip().lower() == "auto" else max(0, int(value))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Everything the crawler reads from .env, config/app.py and config.json, parsed once."""
+
+    # config/app.py
+    debug: bool
+
+    # .env
+    debug_level: int
+    debug_queue_size: int
+    debug_max_bytes: int
+    debug_backups: int
+    disable_target_filter: bool
+    crawl_concurrency: int
+    site_concurrency: int
+    global_concurrency: int
+    per_host_concurrency: int
+    frontier_mode: str
+    frontier_stats: bool
+    frontier_max_size: int
+    visited_index: str
+    visited_false_positive_rate: float
+    results_fsync_rows: int
+    results_fsync_interval: float
+    checkpoint_interval: float
+    seed_sitemaps: bool
+    sitemap_max_urls: int
+    probe_sites: bool
+    probe_concurrency: int
+    probe_timeout: float
+    stage_metrics: bool
+    metrics_port: int
+    dashboard_interval: float
+    extract_workers: int
+    work_lease_seconds: float
+
+    # config.json
+    target_usernames: tuple
+    do_not_allow_in_username: tuple
+    exclude_extensions: frozenset
+    min_username_length: int
+    max_username_length: int
+    min_domain_length: int
+    max_domain_length: int
+    frontier_keywords: MappingProxyType
+    frontier_depth_penalty: float
+    max_page_bytes: int
+    html_content_types: frozenset
+
+    @cached_property
+    def email_filter(self):
+        return EmailFilter(self.target_usernames, self.do_not_allow_in_username,
+                           self.min_username_length, self.max_username_length,
+                           self.min_domain_length, self.max_domain_length)
+
+
+def load_settings():
+    with open(CONFIG_FILE) as f:
+        data = json.load(f)
+
+    keywords = data.get("frontier-keywords")
+    return Settings(
+        debug=_bool(config.app.app_config.get("debug") or False),
+
+        debug_level=int(env("DEBUG_LEVEL", 1)),
+        debug_queue_size=max(1, int(env("DEBUG_QUEUE_SIZE", 10000))),  # lines buffered before debug() blocks
+        debug_max_bytes=int(env("DEBUG_MAX_BYTES", 10 * 1024 * 1024)),  # rotate the log at this size, 0 = never
+        debug_backups=int(env("DEBUG_BACKUPS", 5)),  # rotated logs kept
+        disable_target_filter=_bool(env("DISABLE_TARGET_USERNAMES", "false")),
+        crawl_concurrency=max(1, int(env("CRAWL_CONCURRENCY", 8))),  # in-flight requests per site
+        site_concurrency=max(1, int(env("SITE_CONCURRENCY", 4))),  # websites crawled at once
+        global_concurrency=max(1, int(env("GLOBAL_CONCURRENCY", 32))),  # in-flight requests across all sites
+        per_host_concurrency=max(1, int(env("PER_HOST_CONCURRENCY", 8))),  # in-flight requests per host
+        frontier_mode=env("FRONTIER", "priority").lower(),  # priority | bfs
+        frontier_stats=_bool(env("FRONTIER_STATS", "false")),
+        frontier_max_size=int(env("FRONTIER_MAX_SIZE", 100000)),  # queued URLs per site, 0 = unlimited
+        visited_index=env("VISITED_INDEX", "fingerprint").lower(),  # set | fingerprint | bloom
+        visited_false_positive_rate=float(env("VISITED_FALSE_POSITIVE_RATE", 0.001)),  # bloom only
+        results_fsync_rows=max(1, int(env("RESULTS_FSYNC_ROWS", 100))),  # journal lines per fsync
+        results_fsync_interval=float(env("RESULTS_FSYNC_INTERVAL", 1.0)),  # max seconds between fsyncs
+        checkpoint_interval=float(env("CHECKPOINT_INTERVAL", 30)),  # seconds between crawl checkpoints, 0 = only on Ctrl-C
+        seed_sitemaps=_bool(env("SEED_SITEMAPS", "false")),  # seed from robots.txt/sitemaps and obey robots.txt
+        sitemap_max_urls=int(env("SITEMAP_MAX_URLS", 5000)),  # sitemap URLs queued per site
+        probe_sites=_bool(env("PROBE_SITES", "true")),  # check every row first and crawl only the live sites
+        probe_concurrency=max(1, int(env("PROBE_CONCURRENCY", 16))),  # rows probed at once
+        probe_timeout=float(env("PROBE_TIMEOUT", env("REQUEST_TIMEOUT", 10))),  # seconds per probe request, default REQUEST_TIMEOUT
+        stage_metrics=_bool(env("STAGE_METRICS", "false")),  # time each fetch/parse stage, see core/stage_metrics.py
+        metrics_port=int(env("METRICS_PORT", 0)),  # Prometheus /metrics on 127.0.0.1:port, 0 = off
+        dashboard_interval=float(env("DASHBOARD_INTERVAL", 0)),  # seconds between progress prints, 0 = off
+        extract_workers=_workers(env("EXTRACT_WORKERS", 0)),  # processes scanning pages, "auto" = one per core, 0 = in the fetch threads
+        work_lease_seconds=float(env("WORK_LEASE_SECONDS", 60)),  # distributed.py: a dead worker's rows go to others after this
+
+        target_usernames=tuple(data.get("target-usernames", [])),
+        do_not_allow_in_username=tuple(data.get("do-not-allow-in-username", [])),
+        exclude_extensions=frozenset(data.get("exclude-extensions", [])),
+        min_username_length=int(data.get("min-username-length", 0)),
+        max_username_length=int(data.get("max-username-length", 0)),
+        min_domain_length=int(data.get("min-domain-length", 0)),
+        max_domain_length=int(data.get("max-domain-length", 0)),
+        frontier_keywords=MappingProxyType(dict(keywords)) if keywords is not None else None,
+        frontier_depth_penalty=float(data.get("frontier-depth-penalty", 1)),
+        max_page_bytes=int(data.get("max-page-bytes", 2000000)),  # 0 = no cap
+        html_content_types=frozenset(data.get("html-content-types", ["text/html", "application/xhtml+xml"])),
+    )
+
+
+_settings = None
+
+
+def get_settings():
+    """Return the settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+
+def reload_settings():
+    """Re-read .env, config/app.py and config.json, e.g. from a long-running service.
+
+    Code that already holds a Settings object keeps the old values; crawl_site
+    picks up the new ones on its next site.
+    """
+    global _settings
+    load_dotenv(override=True)
+    importlib.reload(config.app)
+    _settings = load_settings()
+    return _settings
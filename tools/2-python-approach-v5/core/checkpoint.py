@@ -0,0 +1,65 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+
+
+class CheckpointStore:
+    """Crawl state of unfinished rows in a SQLite file, so a resumed run continues mid-site.
+
+    Each row's state (frontier, seen URL keys, emails found, pages fetched,
+    elapsed seconds) is stored as zlib-compressed JSON and replaced in a
+    single transaction, so a crash leaves either the old or the new
+    checkpoint, never half of one.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        if not resume:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sites ("
+                        "row INTEGER PRIMARY KEY, website TEXT NOT NULL, state BLOB NOT NULL, saved_at REAL NOT NULL)")
+        self.db.commit()
+
+    def load(self, idx):
+        found = self.db.execute("SELECT state FROM sites WHERE row = ?", (idx,)).fetchone()
+        return json.loads(zlib.decompress(found[0])) if found else None
+
+    def save(self, idx, website, state):
+        blob = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO sites VALUES (?, ?, ?, ?)", (idx, website, blob, time.time()))
+
+    def delete(self, idx):
+        with self.db:
+            self.db.execute("DELETE FROM sites WHERE row = ?", (idx,))
+
+    def site(self, idx, website):
+        return SiteCheckpoint(self, idx, website)
+
+    def close(self):
+        self.db.close()
+
+
+class SiteCheckpoint:
+    """One row's slot in a CheckpointStore, as handed to crawl_site_async."""
+
+    def __init__(self, store, idx, website):
+        self.store = store
+        self.idx = idx
+        self.website = website
+
+    def load(self):
+        return self.store.load(self.idx)
+
+    def save(self, state):
+        self.store.save(self.idx, self.website, state)
+
+    def clear(self):
+        self.store.delete(self.idx)
@@ -0,0 +1,176 @@
+import time
+import errno
+import socket
+import selectors
+import threading
+
+IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK))
+
+# getaddrinfo errors that mean the name does not exist, as opposed to a resolver that timed out (EAI_AGAIN)
+NO_SUCH_NAME = tuple(code for code in (getattr(socket, "EAI_NONAME", None), getattr(socket, "EAI_NODATA", None)) if code is not None)
+
+
+class DnsStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"lookups": 0, "hits": 0, "failed_fast": 0, "connects": 0, "ipv6": 0, "fallbacks": 0}
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+
+    def summary(self):
+        with self._lock:
+            c = dict(self.counts)
+        return (f"DNS: {c['lookups']} lookups, {c['hits']} cached, {c['failed_fast']} failed fast from the negative cache; "
+                f"{c['connects']} connects, {c['ipv6']} over IPv6, {c['fallbacks']} after a failed first address")
+
+
+class DnsCache:
+    """Resolver cache and Happy Eyeballs connect shared by every connection the Fetcher opens.
+
+    Answers from getaddrinfo are kept for `ttl` seconds; getaddrinfo gives no
+    record TTL, and asking again just to read one would double every cold
+    lookup. Names that do not exist are remembered for `negative_ttl` seconds
+    so a dead domain fails at once instead of on every retry. Failed connects
+    are not cached: a slow but live site may time out once and answer next time.
+
+    connect() interleaves IPv6 and IPv4 addresses and starts the next attempt
+    every `attempt_delay` seconds (or as soon as one fails), keeping the
+    first socket to connect (RFC 8305), so a broken IPv6 route costs a
+    fraction of a second instead of the whole connect timeout.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=60, attempt_delay=0.25):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.attempt_delay = attempt_delay
+        self.stats = DnsStats()
+        self._answers = {}  # (host, port) -> (expires, addrinfo list or OSError)
+        self._lock = threading.Lock()
+        self._resolving = {}  # (host, port) -> lock, so one thread resolves a host at a time
+
+    def _cached(self, key):
+        with self._lock:
+            found = self._answers.get(key)
+        if found and found[0] > time.monotonic():
+            return found[1]
+        return None
+
+    def _remember(self, key, answer, ttl):
+        with self._lock:
+            self._answers[key] = (time.monotonic() + ttl, answer)
+
+    def resolve(self, host, port):
+        """getaddrinfo() for TCP through the cache; raises socket.gaierror for dead names."""
+        key = (host, port)
+        with self._lock:
+            host_lock = self._resolving.setdefault(key, threading.Lock())
+        with host_lock:
+            answer = self._cached(key)
+            if answer is None:
+                self.stats.count("lookups")
+                try:
+                    answer = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+                    self._remember(key, answer, self.ttl)
+                    return answer
+                except socket.gaierror as e:
+                    if e.errno in NO_SUCH_NAME:
+                        self._remember(key, e, self.negative_ttl)
+                    raise
+        if isinstance(answer, OSError):
+            self.stats.count("failed_fast")
+            raise type(answer)(*answer.args)
+        self.stats.count("hits")
+        return answer
+
+    def connect(self, address, timeout=None, source_address=None, socket_options=None, stages=None):
+        """Drop-in for urllib3's create_connection(); adds "dns" and "connect" seconds to a `stages` dict."""
+        host, port = address
+        host = host.strip("[]")
+        start = time.monotonic()
+        infos = _interleave(self.resolve(host, port))
+        if stages is not None:
+            stages["dns"] = stages.get("dns", 0.0) + time.monotonic() - start
+            start = time.monotonic()
+        timeout = timeout if isinstance(timeout, (int, float)) else None
+        sock, attempts = self._race(infos, timeout, source_address, socket_options)
+        if stages is not None:
+            stages["connect"] = stages.get("connect", 0.0) + time.monotonic() - start
+        self.stats.count("connects")
+        if sock.family == socket.AF_INET6:
+            self.stats.count("ipv6")
+        if attempts > 1:
+            self.stats.count("fallbacks")
+        return sock
+
+    def _race(self, infos, timeout, source_address, socket_options):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        selector = selectors.DefaultSelector()
+        pending = []
+        error = None
+        attempts = 0
+        try:
+            while infos or pending:
+                if infos:
+                    family, socktype, proto, _, sockaddr = infos.pop(0)
+                    attempts += 1
+                    sock = socket.socket(family, socktype, proto)
+                    try:
+                        for option in socket_options or ():
+                            sock.setsockopt(*option)
+                        if source_address:
+                            sock.bind(source_address)
+                        sock.setblocking(False)
+                        code = sock.connect_ex(sockaddr)
+                    except OSError as e:
+                        sock.close()
+                        error = e
+                        continue
+                    if code == 0:
+                        return _ready(sock, timeout), attempts
+                    if code not in IN_PROGRESS:
+                        sock.close()
+                        error = OSError(code, f"{errno.errorcode.get(code, code)} connecting to {sockaddr[0]}")
+                        continue
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    pending.append(sock)
+
+                wait = None if deadline is None else deadline - time.monotonic()
+                if infos:
+                    wait = self.attempt_delay if wait is None else min(wait, self.attempt_delay)
+                if wait is not None and wait <= 0:
+                    raise socket.timeout("timed out")
+                for key, _ in selector.select(wait):
+                    sock = key.fileobj
+                    selector.unregister(sock)
+                    pending.remove(sock)
+                    code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if code == 0:
+                        return _ready(sock, timeout), attempts
+                    sock.close()
+                    error = OSError(code, errno.errorcode.get(code, str(code)))
+            raise error or OSError("no addresses to connect to")
+        finally:
+            for sock in pending:
+                sock.close()
+            selector.close()
+
+
+def _ready(sock, timeout):
+    sock.settimeout(timeout)
+    return sock
+
+
+def _interleave(infos):
+    """Alternate address families, starting with the resolver's first choice (RFC 8305 section 4)."""
+    by_family = {}
+    for info in infos:
+        by_family.setdefault(info[0], []).append(info)
+    queues = list(by_family.values())
+    ordered = []
+    while any(queues):
+        for q in queues:
+            if q:
+                ordered.append(q.pop(0))
+    return ordered
@@ -0,0 +1,141 @@
+import time
+import codecs
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from urllib.parse import urljoin
+
+from core.page_scanner import Page, PageScanner, TimedPageScanner
+from core.util.functions.canonical_url import site_host
+
+SLOT_BYTES = 512 * 1024  # most pages fit; a larger body is sent to the worker as bytes
+
+
+def resolve_links(links, base_url, domain):
+    """The (href, anchor text) `links` of a page at `base_url` as absolute URLs, keeping only those on `domain`."""
+    resolved = []
+    for link, anchor_text in links:
+        absolute = urljoin(base_url, link)
+        if site_host(absolute) == domain:
+            resolved.append((absolute, anchor_text))
+    return resolved
+
+
+# Set in each worker process by _init_worker
+_shm = None
+_slot_bytes = 0
+
+
+def _init_worker(name, slot_bytes):
+    global _shm, _slot_bytes
+    _shm = shared_memory.SharedMemory(name)
+    _slot_bytes = slot_bytes
+
+
+def _extract(slot, length, body, encoding, truncated, url, domain, timed):
+    """Worker side: decode and scan one page, from `slot` of the shared buffer or from `body` if it did not fit.
+
+    Returns (Page with unique emails and resolved links, {stage: seconds} or None).
+    """
+    if body is None:
+        view = _shm.buf[slot * _slot_bytes:slot * _slot_bytes + length]
+        try:
+            text = codecs.decode(view, encoding, "replace")
+        finally:
+            view.release()
+    else:
+        text = body.decode(encoding, "replace")
+    stages = {} if timed else None
+    scanner = TimedPageScanner(stages) if timed else PageScanner()
+    scanner.feed(text)
+    page = scanner.close(truncated)
+    start = time.monotonic()
+    links = resolve_links(page.links, url, domain)
+    if timed:
+        stages["url_parse"] = time.monotonic() - start
+    return Page(list(dict.fromkeys(page.emails)), links, page.head, truncated), stages
+
+
+class ExtractPool:
+    """Email and link extraction in `workers` processes, off the event loop and the fetch threads.
+
+    Page bodies are read straight into one of `slots` fixed-size slots of a
+    shared memory block; only the slot number and length are sent to a worker,
+    and back come the unique emails and the resolved on-site links. A fetch
+    waits for a free slot before its request goes out, so when the workers
+    fall behind the fetchers slow down with them instead of piling up bodies.
+    """
+
+    def __init__(self, workers, slots, slot_bytes=SLOT_BYTES):
+        self.workers = workers
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.processes = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.shm.name, slot_bytes))
+        self.spilled = 0  # bodies larger than a slot
+        self._free = None  # asyncio.Queue of slot numbers, made on the running loop
+
+    def read_into(self, slot, chunks, max_bytes=0):
+        """Fetch thread side: copy a body's `chunks` into `slot`, stopping after `max_bytes` (0 = no cap).
+
+        Returns (length, body, truncated); `body` is the whole body as bytes if it
+        outgrew the slot, else None.
+        """
+        start = slot * self.slot_bytes
+        buf, length, spill = self.shm.buf, 0, None
+        for chunk in chunks:
+            truncated = max_bytes and length + len(chunk) > max_bytes
+            if truncated:
+                chunk = chunk[:max_bytes - length]
+            if spill is None and length + len(chunk) > self.slot_bytes:
+                spill = bytearray(buf[start:start + length])
+                self.spilled += 1
+            if spill is None:
+                buf[start + length:start + length + len(chunk)] = chunk
+            else:
+                spill += chunk
+            length += len(chunk)
+            if truncated:
+                return length, bytes(spill) if spill is not None else None, True
+        return length, bytes(spill) if spill is not None else None, False
+
+    async def fetch(self, url, domain, limits, read_body, metrics=None):
+        """Run `read_body(url, self, slot, metrics)` in a fetch slot of `limits`, then extract its page in a worker.
+
+        `read_body` returns (read_into()'s result, encoding). Stage timings of the
+        worker are added to `metrics` (a StageMetrics).
+        """
+        loop = asyncio.get_running_loop()
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for slot in range(self.slots):
+                self._free.put_nowait(slot)
+        slot = await self._free.get()
+        pending = None
+        try:
+            async with limits.slot(url):
+                pending = limits.executor.submit(read_body, url, self, slot, metrics)
+                (length, body, truncated), encoding = await asyncio.wrap_future(pending)
+            pending = self.processes.submit(_extract, slot, length, body, encoding, truncated, url, domain, metrics is not None)
+            page, stages = await asyncio.wrap_future(pending)
+            pending = None
+        finally:
+            if pending is not None and not pending.done():
+                # A thread or worker still uses the slot; it is free again only once that is done
+                pending.add_done_callback(lambda _: self._release_threadsafe(loop, slot))
+            else:
+                self._free.put_nowait(slot)
+        if stages:
+            metrics.add_all(stages)
+        return page
+
+    def _release_threadsafe(self, loop, slot):
+        try:
+            loop.call_soon_threadsafe(self._free.put_nowait, slot)
+        except RuntimeError:
+            pass  # the loop is closed, nothing waits for slots any more
+
+    def close(self):
+        self.processes.shutdown(wait=True, cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,134 @@
+import sys
+import heapq
+import itertools
+from collections import deque
+from urllib.parse import urlsplit
+
+from core.visited_index import make_visited_index
+
+# Path/anchor keywords of pages that usually list the company's generic emails
+DEFAULT_KEYWORD_WEIGHTS = {
+    "contact": 10,
+    "enquir": 8,
+    "inquir": 8,
+    "about": 6,
+    "career": 4,
+    "job": 3,
+    "team": 3,
+    "reach": 3,
+    "office": 2,
+    "location": 2,
+}
+
+FRONTIER_MODES = ("priority", "bfs")
+
+
+class Frontier:
+    """URLs waiting to be fetched, plus an index of every URL key ever queued.
+
+    "bfs" pops in FIFO order. "priority" pops the best-scoring URL first: keyword
+    weights matched in the path or anchor text, minus `depth_penalty` per level.
+    Ties keep FIFO order, so with no keyword hits it behaves like BFS.
+
+    A key stays in the index after its URL is popped, so `key in frontier` means
+    "enqueued or visited" and a page is never queued twice. With `max_size` set,
+    pushes beyond that many queued URLs are dropped.
+
+    The index is a `visited_index` from core/visited_index.py: "set" keeps the
+    keys, "fingerprint" 64-bit hashes of them and "bloom" a scalable Bloom
+    filter with `false_positive_rate`.
+    """
+
+    def __init__(self, mode="priority", keyword_weights=None, depth_penalty=1.0, max_size=0, visited_index="set",
+                 false_positive_rate=0.001):
+        if mode not in FRONTIER_MODES:
+            raise ValueError(f"Unknown frontier mode {mode!r}, expected one of {FRONTIER_MODES}")
+        self.mode = mode
+        weights = DEFAULT_KEYWORD_WEIGHTS if keyword_weights is None else keyword_weights
+        self.keyword_weights = {k.lower(): float(w) for k, w in weights.items()}
+        self.depth_penalty = float(depth_penalty)
+        self._queue = deque()
+        self._heap = []
+        self._seq = itertools.count()
+        self._seen = make_visited_index(visited_index, false_positive_rate)
+        self._url_bytes = 0
+        self.max_size = int(max_size or 0)
+        self.peak_size = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    def score(self, url, level, anchor_text=""):
+        haystack = urlsplit(url).path.lower() + " " + anchor_text.lower()
+        return sum(w for k, w in self.keyword_weights.items() if k in haystack) - self.depth_penalty * level
+
+    def push(self, url, level, anchor_text="", key=None, boost=0.0):
+        """Queue `url` unless its key (default: the url) was seen before; returns True if queued.
+
+        `boost` is added to the score, e.g. for a sitemap's priority hint.
+        """
+        key = url if key is None else key
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        if self.max_size and len(self) >= self.max_size:
+            self.dropped += 1
+            return False
+        self._seen.add(key)
+        self._url_bytes += sys.getsizeof(url)
+        if self.mode == "bfs":
+            self._queue.append((url, level))
+        else:
+            heapq.heappush(self._heap, (-(self.score(url, level, anchor_text) + boost), next(self._seq), url, level))
+        self.peak_size = max(self.peak_size, len(self))
+        return True
+
+    def pop(self):
+        """Return the next (url, level)."""
+        if self.mode == "bfs":
+            url, level = self._queue.popleft()
+        else:
+            _, _, url, level = heapq.heappop(self._heap)
+        self._url_bytes -= sys.getsizeof(url)
+        return url, level
+
+    def state(self, requeue=()):
+        """JSON-friendly snapshot for a checkpoint; `requeue` are popped (url, level) pairs to fetch again.
+
+        Requeued URLs are scored without their anchor text, which is not kept after a pop.
+        """
+        if self.mode == "bfs":
+            queued = [[url, level, 0] for url, level in list(requeue) + list(self._queue)]
+        else:
+            queued = [[url, level, self.score(url, level)] for url, level in requeue]
+            queued += [[url, level, -neg] for neg, _, url, level in sorted(self._heap)]
+        return {"queued": queued, "seen": self._seen.state(), "peak_size": self.peak_size,
+                "duplicates": self.duplicates, "dropped": self.dropped}
+
+    def restore(self, state):
+        """Load a state() snapshot into this (empty) frontier."""
+        self._seen.restore(state["seen"])
+        for url, level, score in state["queued"]:
+            self._url_bytes += sys.getsizeof(url)
+            if self.mode == "bfs":
+                self._queue.append((url, level))
+            else:
+                heapq.heappush(self._heap, (-score, next(self._seq), url, level))
+        self.peak_size = max(state["peak_size"], len(self))
+        self.duplicates = state["duplicates"]
+        self.dropped = state["dropped"]
+
+    def memory_bytes(self):
+        """Approximate bytes held by the queued URLs and the seen-key index."""
+        entry = sys.getsizeof((0, 0)) if self.mode == "bfs" else sys.getsizeof((0.0, 0, "", 0))
+        containers = sys.getsizeof(self._queue) + sys.getsizeof(self._heap)
+        return containers + len(self) * entry + self._url_bytes + self._seen.memory_bytes()
+
+    def summary(self):
+        return (f"{len(self)} queued (peak {self.peak_size}), {len(self._seen)} seen, "
+                f"{self.duplicates} duplicates, {self.dropped} dropped, ~{self.memory_bytes() // 1024} KiB")
+
+    def __contains__(self, key):
+        return key in self._seen
+
+    def __len__(self):
+        return len(self._queue) + len(self._heap)
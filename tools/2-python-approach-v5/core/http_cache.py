@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from requests.structures import CaseInsensitiveDict
+
+from core.util.functions.canonical_url import canonicalize_url
+
+
+class CacheStats:
+    """Counters for one run of the cache, printed at the end."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0, "bytes_saved": 0}
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+
+    def summary(self):
+        with self._lock:
+            c = dict(self.counts)
+        return (f"HTTP cache: {c['hits']} hits, {c['revalidated']} revalidated (304), {c['misses']} misses, "
+                f"{c['stored']} stored, {c['evicted']} evicted, {c['bytes_saved'] // 1024} KiB not downloaded")
+
+
+class CachedResponse:
+    """The parts of requests.Response the crawlers use, served from a cache entry."""
+
+    from_cache = True
+
+    def __init__(self, url, headers, encoding, content):
+        self.url = url
+        self.status_code = 200
+        self.ok = True
+        self.headers = CaseInsensitiveDict(headers)
+        self.encoding = encoding
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        size = chunk_size or len(self.content) or 1
+        for i in range(0, len(self.content), size):
+            yield self.content[i:i + size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class HttpCache:
+    """Page bodies from earlier runs, in one SQLite file, keyed by canonical URL.
+
+    Entries younger than `ttl` seconds are served without a request. Older
+    ones are revalidated with If-None-Match / If-Modified-Since, and a 304
+    serves the stored body. Only complete 200 responses up to `max_entry_bytes`
+    are stored (a page cut off at max-page-bytes is not). Bodies are
+    zlib-compressed, and once the total passes `max_bytes` the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path, ttl=86400, max_bytes=500 * 1024 * 1024, max_entry_bytes=5 * 1024 * 1024):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS pages ("
+                        "key TEXT PRIMARY KEY, url TEXT, headers TEXT, encoding TEXT, etag TEXT, last_modified TEXT, "
+                        "body BLOB, size INTEGER, stored_at REAL, used_at REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM pages").fetchone()[0]
+
+    def fresh(self, url):
+        """True if get() would serve `url` from the cache without a request."""
+        with self._lock:
+            entry = self.db.execute("SELECT stored_at FROM pages WHERE key = ?", (canonicalize_url(url),)).fetchone()
+        return entry is not None and time.time() - entry[0] < self.ttl
+
+    def get(self, fetcher, url, **kwargs):
+        """fetcher.request(url) through the cache; returns a CachedResponse or a requests.Response."""
+        key = canonicalize_url(url)
+        with self._lock:
+            entry = self.db.execute("SELECT url, headers, encoding, etag, last_modified, body, size, stored_at "
+                                    "FROM pages WHERE key = ?", (key,)).fetchone()
+        if entry:
+            cached_url, headers, encoding, etag, last_modified, body, size, stored_at = entry
+            if time.time() - stored_at < self.ttl:
+                self._touch(key)
+                self.stats.count("hits")
+                self.stats.count("bytes_saved", size)
+                return CachedResponse(cached_url, json.loads(headers), encoding, zlib.decompress(body))
+            conditional = {}
+            if etag:
+                conditional["If-None-Match"] = etag
+            if last_modified:
+                conditional["If-Modified-Since"] = last_modified
+            if conditional:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **conditional}
+
+        response = fetcher.request(url, **kwargs)
+        if entry and response.status_code == 304:
+            response.close()
+            self._touch(key, fresh=True)
+            self.stats.count("revalidated")
+            self.stats.count("bytes_saved", size)
+            return CachedResponse(cached_url, json.loads(headers), encoding, zlib.decompress(body))
+
+        self.stats.count("misses")
+        if response.status_code == 200:
+            if kwargs.get("stream"):
+                self._record_stream(key, response)
+            else:
+                self._store(key, response, response.content)
+        return response
+
+    def _record_stream(self, key, response):
+        """Store the body once the caller has read all of it through iter_content()."""
+        original = response.iter_content
+
+        def iter_content(chunk_size=1, decode_unicode=False):
+            chunks, size = [], 0
+            for chunk in original(chunk_size, decode_unicode):
+                if chunks is not None:
+                    size += len(chunk)
+                    chunks.append(chunk)
+                    if size > self.max_entry_bytes:
+                        chunks = None
+                yield chunk
+            if chunks is not None:
+                self._store(key, response, b"".join(chunks))
+
+        response.iter_content = iter_content
+
+    def _store(self, key, response, content):
+        if len(content) > self.max_entry_bytes:
+            return
+        headers = {k: response.headers[k] for k in ("Content-Type",) if k in response.headers}
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock:
+            old = self.db.execute("SELECT LENGTH(body) FROM pages WHERE key = ?", (key,)).fetchone()
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (key, response.url, json.dumps(headers), response.encoding, response.headers.get("ETag"),
+                                 response.headers.get("Last-Modified"), body, len(content), now, now))
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            self._evict()
+        self.stats.count("stored")
+
+    def _touch(self, key, fresh=False):
+        now = time.time()
+        with self._lock, self.db:
+            if fresh:
+                self.db.execute("UPDATE pages SET used_at = ?, stored_at = ? WHERE key = ?", (now, now, key))
+            else:
+                self.db.execute("UPDATE pages SET used_at = ? WHERE key = ?", (now, key))
+
+    def _evict(self):
+        # Called with the lock held; trims to 90% so a full cache does not evict on every store
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        with self.db:
+            for key, size in self.db.execute("SELECT key, LENGTH(body) FROM pages ORDER BY used_at").fetchall():
+                if self.total_bytes <= target:
+                    break
+                self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.stats.count("evicted")
+
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -0,0 +1,96 @@
+import re
+import time
+import string
+from collections import namedtuple
+
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+LINK_REGEX = re.compile(r'href=["\'](.*?)["\'](?:[^>]*>([^<]{0,100}))?')  # (href, anchor text)
+
+# Every character EMAIL_REGEX can match, so a match never spans anything else
+EMAIL_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-@")
+
+HEAD_CHARS = 200
+
+Page = namedtuple("Page", "emails links head truncated")
+
+
+class PageScanner:
+    """Scan a page for email candidates and (href, anchor text) links chunk by chunk.
+
+    Each pattern is run only up to a point no match can straddle: the last
+    non-email character for emails, the last "<" for links. The rest is carried
+    into the next chunk, so well-formed pages give the same matches as one
+    findall over the whole text.
+    """
+
+    def __init__(self):
+        self.emails = []
+        self.links = []
+        self.head = ""
+        self._email_carry = ""
+        self._link_carry = ""
+
+    def feed(self, chunk):
+        if len(self.head) < HEAD_CHARS:
+            self.head += chunk[:HEAD_CHARS - len(self.head)]
+        self._scan_emails(chunk)
+        self._scan_links(chunk)
+
+    def _scan_emails(self, chunk):
+        buf = self._email_carry + chunk
+        end = len(buf)
+        while end > 0 and buf[end - 1] in EMAIL_CHARS:
+            end -= 1
+        self.emails.extend(EMAIL_REGEX.findall(buf, 0, end))
+        self._email_carry = buf[end:]
+
+    def _scan_links(self, chunk):
+        buf = self._link_carry + chunk
+        end = buf.rfind("<")
+        if end > 0:
+            self.links.extend(LINK_REGEX.findall(buf, 0, end))
+            buf = buf[end:]
+        self._link_carry = buf
+
+    def close(self, truncated=False):
+        self.emails.extend(EMAIL_REGEX.findall(self._email_carry))
+        self.links.extend(LINK_REGEX.findall(self._link_carry))
+        self._email_carry = self._link_carry = ""
+        return Page(self.emails, self.links, self.head, truncated)
+
+
+class TimedPageScanner(PageScanner):
+    """PageScanner that adds the seconds spent on each pattern to `stages` ("emails", "links")."""
+
+    def __init__(self, stages):
+        super().__init__()
+        self.stages = stages
+        stages.setdefault("emails", 0.0)
+        stages.setdefault("links", 0.0)
+
+    def _scan_emails(self, chunk):
+        start = time.monotonic()
+        super()._scan_emails(chunk)
+        self.stages["emails"] += time.monotonic() - start
+
+    def _scan_links(self, chunk):
+        start = time.monotonic()
+        super()._scan_links(chunk)
+        self.stages["links"] += time.monotonic() - start
+
+    def close(self, truncated=False):
+        start = time.monotonic()
+        self.emails.extend(EMAIL_REGEX.findall(self._email_carry))
+        middle = time.monotonic()
+        self.links.extend(LINK_REGEX.findall(self._link_carry))
+        self.stages["emails"] += middle - start
+        self.stages["links"] += time.monotonic() - middle
+        self._email_carry = self._link_carry = ""
+        return Page(self.emails, self.links, self.head, truncated)
+
+
+def scan_text(text):
+    """Scan a whole page at once."""
+    scanner = PageScanner()
+    scanner.feed(text)
+    return scanner.close()
@@ -0,0 +1,220 @@
+import time
+import threading
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATE_WINDOW = 30  # seconds of samples behind pages/s
+
+
+class SiteProgress:
+    """Live numbers of one site's crawl, set from the event loop as it goes."""
+
+    def __init__(self, parent, idx, website, timeout_secs):
+        self.parent = parent
+        self.idx = idx
+        self.website = website
+        self.timeout_secs = timeout_secs
+        self.started = time.monotonic()
+        self.pages = 0
+        self.emails = 0
+        self.frontier = 0
+        self.in_flight = 0
+
+    def page(self, emails):
+        self.pages += 1
+        self.emails = emails
+        self.parent.pages += 1
+
+    def error(self, error_class):
+        self.parent.errors[error_class] += 1
+
+
+class CrawlProgress:
+    """Counters of a batch run, read by the metrics endpoint and the dashboard.
+
+    The crawl only assigns attributes and bumps counters; readers take a
+    snapshot() from their own thread, so nothing here waits on the fetch loop.
+    """
+
+    def __init__(self, site_concurrency, fetcher=None):
+        self.site_concurrency = site_concurrency
+        self.fetcher = fetcher
+        self.started = time.monotonic()
+        self.pending = {}  # idx -> timeout_secs of rows not started yet
+        self.running = {}  # idx -> SiteProgress
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.done_seconds = 0.0
+        self.pages = 0
+        self.errors = Counter()
+        self._samples = deque()
+        self._lock = threading.Lock()
+
+    def add_rows(self, jobs):
+        for idx, _, _, timeout_minutes in jobs:
+            self.pending[idx] = timeout_minutes * 60
+
+    def skip_row(self, idx):
+        self.pending.pop(idx, None)
+        self.skipped += 1
+
+    def start_site(self, idx, website, timeout_minutes):
+        self.pending.pop(idx, None)
+        site = SiteProgress(self, idx, website, timeout_minutes * 60)
+        self.running[idx] = site
+        return site
+
+    def finish_site(self, site):
+        self.running.pop(site.idx, None)
+        self.done += 1
+        self.done_seconds += time.monotonic() - site.started
+
+    def fail_site(self, site):
+        self.running.pop(site.idx, None)
+        self.failed += 1
+
+    def pages_per_second(self):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, self.pages))
+            while len(self._samples) > 2 and now - self._samples[0][0] > RATE_WINDOW:
+                self._samples.popleft()
+            (t0, p0), (t1, p1) = self._samples[0], self._samples[-1]
+        if t1 - t0 < 1:
+            return self.pages / max(now - self.started, 1e-9)
+        return (p1 - p0) / (t1 - t0)
+
+    def snapshot(self):
+        now = time.monotonic()
+        running = list(self.running.values())
+        pending = list(self.pending.values())
+        # Worst case: every remaining row runs to its timeout, site_concurrency at a time
+        budget = sum(pending) + sum(max(s.timeout_secs - (now - s.started), 0) for s in running)
+        eta_budget = budget / self.site_concurrency
+        eta_observed = None
+        if self.done:
+            per_row = self.done_seconds / self.done
+            eta_observed = (len(pending) * per_row + sum(max(per_row - (now - s.started), 0) for s in running)) / self.site_concurrency
+        http = self.fetcher.stats.snapshot() if self.fetcher else {}
+        return {
+            "elapsed": now - self.started,
+            "pages": self.pages,
+            "pages_per_second": self.pages_per_second(),
+            "in_flight": sum(s.in_flight for s in running),
+            "rows": {"pending": len(pending), "running": len(running), "done": self.done, "skipped": self.skipped,
+                     "failed": self.failed},
+            "sites": [(s.idx, s.website, s.pages, s.emails, s.frontier, s.in_flight, now - s.started) for s in running],
+            "errors": dict(self.errors),
+            "eta_budget": eta_budget,
+            "eta_observed": eta_observed,
+            "http": http,
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(snap):
+    """Prometheus text exposition (format 0.0.4) of a snapshot()."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP email_crawler_{name} {help_text}")
+        lines.append(f"# TYPE email_crawler_{name} {kind}")
+        for labels, value in samples:
+            label_text = "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels.items()) + "}" if labels else ""
+            lines.append(f"email_crawler_{name}{label_text} {value}")
+
+    metric("pages_total", "counter", "Pages fetched and scanned.", [({}, snap["pages"])])
+    metric("pages_per_second", "gauge", f"Pages per second over the last {RATE_WINDOW}s.", [({}, round(snap["pages_per_second"], 3))])
+    metric("in_flight_requests", "gauge", "Page requests in flight.", [({}, snap["in_flight"])])
+    metric("rows", "gauge", "Input rows by state.", [({"state": k}, v) for k, v in snap["rows"].items()])
+    metric("frontier_size", "gauge", "URLs queued per running site.",
+           [({"site": website, "row": idx + 1}, frontier) for idx, website, _, _, frontier, _, _ in snap["sites"]])
+    metric("site_emails", "gauge", "Emails found per running site.",
+           [({"site": website, "row": idx + 1}, emails) for idx, website, _, emails, _, _, _ in snap["sites"]])
+    metric("site_pages", "gauge", "Pages fetched per running site.",
+           [({"site": website, "row": idx + 1}, pages) for idx, website, pages, _, _, _, _ in snap["sites"]])
+    metric("errors_total", "counter", "Failed page fetches by error class.", [({"class": k}, v) for k, v in snap["errors"].items()])
+    eta = [({"basis": "timeout_budget"}, round(snap["eta_budget"], 1))]
+    if snap["eta_observed"] is not None:
+        eta.append(({"basis": "observed"}, round(snap["eta_observed"], 1)))
+    metric("eta_seconds", "gauge", "Estimated seconds until every row is done.", eta)
+    if snap["http"]:
+        metric("http_requests_total", "counter", "HTTP requests made by the fetcher.", [({}, snap["http"]["requests"])])
+        metric("http_new_connections_total", "counter", "Connections opened by the fetcher.", [({}, snap["http"]["new_connections"])])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves prometheus_text() of a CrawlProgress on http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, progress, host="127.0.0.1", port=9464):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = prometheus_text(progress.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/metrics"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _duration(seconds):
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m" if seconds >= 3600 else f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def dashboard_text(snap, max_sites=8):
+    rows = snap["rows"]
+    total = sum(rows.values())
+    errors = ", ".join(f"{k} {v}" for k, v in sorted(snap["errors"].items(), key=lambda e: -e[1])[:4]) or "none"
+    failed = f", {rows['failed']} failed" if rows["failed"] else ""
+    lines = [f"-- {_duration(snap['elapsed'])} | rows {rows['done'] + rows['skipped']}/{total} done, {rows['running']} running{failed}"
+             f" | {snap['pages_per_second']:.1f} pages/s, {snap['pages']} pages, {snap['in_flight']} in flight"
+             f" | ETA ~{_duration(snap['eta_observed'])}, at most {_duration(snap['eta_budget'])}",
+             f"   errors: {errors}"]
+    for idx, website, pages, emails, frontier, in_flight, elapsed in snap["sites"][:max_sites]:
+        lines.append(f"   [{idx + 1}] {website[:50]:<50} {pages:>5} pages {emails:>3} emails {frontier:>6} queued {in_flight:>2} in flight {_duration(elapsed)}")
+    if len(snap["sites"]) > max_sites:
+        lines.append(f"   ... {len(snap['sites']) - max_sites} more sites running")
+    return "\n".join(lines)
+
+
+class Dashboard(threading.Thread):
+    """Prints dashboard_text() every `interval` seconds until stop()."""
+
+    def __init__(self, progress, interval=5.0):
+        super().__init__(name="dashboard", daemon=True)
+        self.progress = progress
+        self.interval = interval
+        self._stopping = threading.Event()
+
+    def run(self):
+        while not self._stopping.wait(self.interval):
+            print(dashboard_text(self.progress.snapshot()), flush=True)
+
+    def stop(self):
+        self._stopping.set()
@@ -0,0 +1,120 @@
+import os
+import csv
+import time
+import threading
+from collections import defaultdict
+
+JOURNAL_HEADER = ["Event", "Row", "Website URL", "Email", "Found At URL"]
+
+
+class ResultWriter:
+    """Append-only journal of crawl results, written as each email is found.
+
+    Every line is an event for an input row: "start" when its crawl begins,
+    "email" for each (email, found_url) and "done" when it stops. The file is
+    fsynced every `fsync_rows` lines or `fsync_interval` seconds and on every
+    "done", so a crash or kill -9 loses at most the last batch.
+
+    `results()` rebuilds the {website: [(email, found_url)]} mapping that
+    save_all_results() writes. Sites are ordered by input row, not by finish
+    time, so "#" and "Website-#" come out the same after any number of restarts.
+    """
+
+    def __init__(self, path, resume=False, fsync_rows=100, fsync_interval=1.0):
+        self.path = path
+        self.fsync_rows = fsync_rows
+        self.fsync_interval = fsync_interval
+        self.finished = set()  # rows whose crawl completed, in this run or an earlier one
+        if resume and os.path.exists(path):
+            self.finished = {row for event, row, *_ in self._events() if event == "done"}
+            self._terminate_partial_line()
+            self.f = open(path, "a", newline='', encoding='utf-8')
+            self.writer = csv.writer(self.f)
+        else:
+            self.f = open(path, "w", newline='', encoding='utf-8')
+            self.writer = csv.writer(self.f)
+            self.writer.writerow(JOURNAL_HEADER)
+        self._lock = threading.Lock()
+        self._sync()
+
+    def _events(self):
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for line in reader:
+                # A line cut short by a crash is ignored
+                if len(line) == len(JOURNAL_HEADER) and line[1].isdigit():
+                    yield line[0], int(line[1]), line[2], line[3], line[4]
+
+    def _terminate_partial_line(self):
+        with open(self.path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\r\n")
+
+    def _write(self, event, idx, website, email="", found_url="", sync=False):
+        with self._lock:
+            self.writer.writerow([event, idx, website, email, found_url])
+            self._pending += 1
+            if sync or self._pending >= self.fsync_rows or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def start(self, idx, website):
+        """Record that row `idx` started; returns a list-like sink for its (email, found_url) pairs."""
+        self._write("start", idx, website)
+        return _RowSink(self, idx, website)
+
+    def done(self, idx, website):
+        self._write("done", idx, website, sync=True)
+        self.finished.add(idx)
+
+    def results(self):
+        """{website: [(email, found_url)]} for every started row, in input row order."""
+        with self._lock:
+            if not self.f.closed:
+                self.f.flush()
+        rows = defaultdict(list)
+        started = {}
+        seen = set()
+        for event, idx, website, email, found_url in self._events():
+            started.setdefault(idx, website)
+            # A row re-crawled after a restart repeats emails it already journaled
+            if event == "email" and (idx, email) not in seen:
+                seen.add((idx, email))
+                rows[idx].append((email, found_url))
+        all_results = defaultdict(list)
+        for idx in sorted(started):
+            all_results[started[idx]].extend(rows[idx])
+        return all_results
+
+    def close(self):
+        with self._lock:
+            if not self.f.closed:
+                self._sync()
+                self.f.close()
+
+
+class _RowSink:
+    """What crawl_site_async appends (email, found_url) to, journaling each pair."""
+
+    def __init__(self, writer, idx, website):
+        self.writer = writer
+        self.idx = idx
+        self.website = website
+        self.count = 0
+
+    def append(self, item):
+        email, found_url = item
+        self.writer._write("email", self.idx, self.website, email, found_url)
+        self.count += 1
+
+    def __len__(self):
+        return self.count
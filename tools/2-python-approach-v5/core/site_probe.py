@@ -0,0 +1,134 @@
+import time
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from core.dns_cache import NO_SUCH_NAME
+from core.fetcher import get_fetcher
+from core.util.functions.canonical_url import site_host
+from core.util.functions.debug import debug
+
+PROBE_BYTES = 65536  # enough of the landing page to spot a parking template
+
+# Hosts of domain marketplaces and parking services a parked domain redirects to
+PARKING_HOSTS = ("sedoparking.com", "sedo.com", "parkingcrew.net", "bodis.com", "hugedomains.com", "dan.com",
+                 "afternic.com", "above.com", "parklogic.com", "undeveloped.com", "domainmarket.com", "uniregistry.com")
+
+# Phrases parking templates put on the page
+PARKED_PHRASES = ("this domain is for sale", "this domain may be for sale", "buy this domain", "domain is parked",
+                  "parked free", "domain parking", "this domain has expired", "is available for purchase",
+                  "the domain name is for sale", "parkingcrew", "sedoparking", "window.park")
+
+ALIVE, PARKED, DEAD, RETRY = "alive", "parked", "dead", "retry"
+
+# Statuses that say nothing lasting about the site: throttling, server trouble and WAFs
+# that turn away the default User-Agent. The row is probed again on the next run.
+TRANSIENT_STATUSES = (403, 429)
+
+
+@dataclass
+class ProbeResult:
+    """What one request to a row's start URL showed, before any crawling."""
+
+    website_url: str
+    status: str  # alive | parked | dead | retry
+    final_url: str = ""
+    http_status: int = None
+    reason: str = ""
+    seconds: float = 0.0
+
+    @property
+    def crawl_domain(self):
+        return site_host(self.final_url) if self.final_url else ""
+
+    @property
+    def redirected(self):
+        return bool(self.final_url) and site_host(self.final_url) != site_host(self.website_url)
+
+
+def _parking_reason(final_url, head):
+    host = site_host(final_url)
+    for parking_host in PARKING_HOSTS:
+        if host == parking_host or host.endswith("." + parking_host):
+            return f"redirects to {parking_host}"
+    text = head.lower()
+    for phrase in PARKED_PHRASES:
+        if phrase in text:
+            return f"page says {phrase!r}"
+    return ""
+
+
+def _causes(e):
+    """A failed request and the errors under it, outermost first, e.g. down to the gaierror under requests' ConnectionError."""
+    while e is not None:
+        yield e
+        inner = e.args[0] if e.args and isinstance(e.args[0], BaseException) else getattr(e, "reason", None)
+        e = inner if isinstance(inner, BaseException) else e.__cause__
+
+
+def _failure_status(e):
+    """DEAD for a name that does not exist or a request that can never work, RETRY for network trouble that may pass."""
+    causes = list(_causes(e))
+    for cause in causes:
+        if isinstance(cause, socket.gaierror):
+            # EAI_AGAIN and friends are a resolver that did not answer, not an answer
+            return DEAD if cause.errno in NO_SUCH_NAME else RETRY
+        if isinstance(cause, requests.exceptions.SSLError):
+            return DEAD
+    transient = (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                 TimeoutError, ConnectionError)
+    return RETRY if any(isinstance(cause, transient) for cause in causes) else DEAD
+
+
+def probe_site(website_url, timeout=None):
+    """GET `website_url`, following redirects, and classify it from the status and the first PROBE_BYTES.
+
+    A GET rather than a HEAD: plenty of servers answer HEAD with 403/405, and
+    the body is needed to spot a parking page anyway. Only the start of the
+    body is read, and never from HTTP_CACHE, where an old error page could answer.
+    `timeout` defaults to the fetcher's REQUEST_TIMEOUT.
+    """
+    start = time.monotonic()
+    kwargs = {"timeout": timeout} if timeout else {}
+    try:
+        with get_fetcher().get(website_url, cached=False, stream=True, **kwargs) as r:
+            head = b""
+            if r.status_code < 400:
+                for chunk in r.iter_content(chunk_size=PROBE_BYTES):
+                    head += chunk
+                    if len(head) >= PROBE_BYTES:
+                        break
+            final_url, http_status, encoding = r.url, r.status_code, r.encoding
+    except Exception as e:
+        cause = list(_causes(e))[-1]
+        return ProbeResult(website_url, _failure_status(e), reason=f"{type(cause).__name__}: {cause}",
+                           seconds=time.monotonic() - start)
+
+    seconds = time.monotonic() - start
+    if http_status in TRANSIENT_STATUSES or http_status >= 500:
+        return ProbeResult(website_url, RETRY, final_url, http_status, f"HTTP {http_status}", seconds)
+    if http_status >= 400:
+        return ProbeResult(website_url, DEAD, final_url, http_status, f"HTTP {http_status}", seconds)
+    reason = _parking_reason(final_url, head.decode(encoding or "utf-8", errors="replace"))
+    if reason:
+        return ProbeResult(website_url, PARKED, final_url, http_status, reason, seconds)
+    reason = f"redirects to {site_host(final_url)}" if site_host(final_url) != site_host(website_url) else ""
+    return ProbeResult(website_url, ALIVE, final_url, http_status, reason, seconds)
+
+
+def probe_sites(website_urls, concurrency=16, timeout=None):
+    """Probe every distinct URL in parallel; returns {website_url: ProbeResult}."""
+    urls = list(dict.fromkeys(website_urls))
+    if not urls:
+        return {}
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, len(urls)))
+    try:
+        results = dict(zip(urls, pool.map(lambda url: probe_site(url, timeout), urls)))
+    finally:
+        # On Ctrl-C, drop the probes not started yet rather than waiting for them
+        pool.shutdown(wait=False, cancel_futures=True)
+    for result in results.values():
+        debug(f"Probe {result.website_url}: {result.status} {result.final_url} {result.reason}".rstrip())
+    return results
@@ -0,0 +1,122 @@
+import time
+import zlib
+from collections import deque
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+import xml.etree.ElementTree as ET
+
+from core.fetcher import get_fetcher
+from core.util.functions.debug import debug
+
+CHUNK_SIZE = 16384
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_PRIORITY = 0.5  # what the sitemap protocol assumes when <priority> is missing
+
+
+def fetch_robots(website_url):
+    """Fetch and parse the site's robots.txt; a missing file allows everything."""
+    robots = RobotFileParser(urljoin(website_url, "/robots.txt"))
+    try:
+        r = get_fetcher().get(robots.url)
+    except Exception as e:
+        debug(f"robots.txt failed: {robots.url} -> {e}")
+        robots.allow_all = True
+        return robots
+    if r.status_code in (401, 403):
+        robots.disallow_all = True
+    elif r.status_code >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(r.text.splitlines())
+    return robots
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _out_of_time(deadline, stop):
+    return (deadline is not None and time.monotonic() >= deadline) or (stop is not None and stop.is_set())
+
+
+def _parse_sitemap(url, deadline=None, stop=None):
+    """Yield ("sitemap" | "url", loc, priority) from one sitemap, streamed and gunzipped as needed.
+
+    Stops early once time.monotonic() passes `deadline` or the `stop` event is set.
+    """
+    kwargs = {}
+    if deadline is not None:
+        # The request may not outlast the deadline either, retries included
+        fetcher = get_fetcher()
+        kwargs["timeout"] = max(min(fetcher.timeout, (deadline - time.monotonic()) / (fetcher.retries + 1)), 0.1)
+    with get_fetcher().get(url, stream=True, **kwargs) as r:
+        if r.status_code != 200:
+            debug(f"Sitemap {url} -> HTTP {r.status_code}")
+            return
+        parser = ET.XMLPullParser(events=("end",))
+        gunzip = None
+        loc = priority = None
+        first = True
+        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+            if _out_of_time(deadline, stop):
+                debug(f"Sitemap {url} cut short: out of time")
+                return
+            if first:
+                # .xml.gz files are served compressed, without a Content-Encoding requests would undo
+                if chunk[:2] == GZIP_MAGIC:
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                first = False
+            parser.feed(gunzip.decompress(chunk) if gunzip else chunk)
+            for _, elem in parser.read_events():
+                tag = _local_name(elem.tag)
+                if tag == "loc":
+                    loc = (elem.text or "").strip()
+                elif tag == "priority":
+                    priority = elem.text
+                elif tag in ("url", "sitemap"):
+                    if loc:
+                        yield tag, loc, priority
+                    loc = priority = None
+                    elem.clear()  # keeps memory flat on 50k-URL sitemaps
+
+
+def iter_sitemap_urls(sitemap_urls, max_urls, max_sitemaps=50, deadline=None, stop=None):
+    """Yield (page_url, priority 0-1) from sitemaps, following sitemap indexes breadth-first.
+
+    Gives up, keeping what it has, once time.monotonic() passes `deadline` or the `stop` event is set.
+    """
+    queue = deque(sitemap_urls)
+    seen = set()
+    count = 0
+    while queue and len(seen) < max_sitemaps and not _out_of_time(deadline, stop):
+        url = queue.popleft()
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            for kind, loc, priority in _parse_sitemap(url, deadline, stop):
+                if kind == "sitemap":
+                    queue.append(loc)
+                    continue
+                try:
+                    priority = min(max(float(priority), 0.0), 1.0)
+                except (TypeError, ValueError):
+                    priority = DEFAULT_PRIORITY
+                yield loc, priority
+                count += 1
+                if count >= max_urls:
+                    return
+        except Exception as e:
+            debug(f"Sitemap failed: {url} -> {e}")
+
+
+def discover_seeds(website_url, max_urls, sitemaps=True, deadline=None, stop=None):
+    """robots.txt rules for the site, plus up to `max_urls` (url, priority) pairs from its sitemaps.
+
+    Sitemaps are read only until time.monotonic() passes `deadline` or the `stop` event is set.
+    """
+    robots = fetch_robots(website_url)
+    if not sitemaps or _out_of_time(deadline, stop):
+        return robots, []
+    sitemap_urls = robots.site_maps() or [urljoin(website_url, "/sitemap.xml")]
+    return robots, list(iter_sitemap_urls(sitemap_urls, max_urls, deadline=deadline, stop=stop))
@@ -0,0 +1,81 @@
+import json
+import time
+import threading
+from datetime import datetime
+
+# In the order a page goes through them. dns, connect and tls are only split out
+# with DNS_CACHE on; otherwise they are part of ttfb.
+STAGES = ("throttle", "dns", "connect", "tls", "ttfb", "body", "emails", "links", "url_parse")
+
+
+class StageMetrics:
+    """Seconds and counts per stage for one site or a whole run.
+
+    add_all() is called from the fetch threads and the event loop alike. A
+    site's numbers are also added to its `parent`, the run total.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.counts = dict.fromkeys(STAGES, 0)
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def add_all(self, stages, fetches=0):
+        """Add a {stage: seconds} dict, e.g. the timings of one page fetch."""
+        with self._lock:
+            for stage, seconds in stages.items():
+                self.seconds[stage] += seconds
+                self.counts[stage] += 1
+            self.fetches += fetches
+        if self.parent:
+            self.parent.add_all(stages, fetches)
+
+    def add(self, stage, seconds):
+        self.add_all({stage: seconds})
+
+    def as_dict(self):
+        with self._lock:
+            return {"fetches": self.fetches,
+                    "stages": {s: {"seconds": round(self.seconds[s], 6), "count": self.counts[s],
+                                   "mean_ms": round(self.seconds[s] * 1000 / self.counts[s], 3) if self.counts[s] else 0}
+                               for s in STAGES}}
+
+    def summary(self):
+        with self._lock:
+            total = sum(self.seconds.values()) or 1
+            parts = [f"{s} {self.seconds[s]:.2f}s ({self.seconds[s] * 100 / total:.0f}%)" for s in STAGES if self.counts[s]]
+        return f"{self.fetches} fetches: " + (", ".join(parts) or "nothing timed")
+
+
+class RunMetrics:
+    """Stage timings of every site in a run, written as one JSON file at the end."""
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._start = time.monotonic()
+        self.total = StageMetrics()
+        self.sites = {}  # website -> {"metrics": StageMetrics, ...}
+        self._lock = threading.Lock()
+
+    def site(self, website):
+        """A new StageMetrics for `website`, adding into the run total."""
+        metrics = StageMetrics(self.total)
+        with self._lock:
+            self.sites[website] = {"metrics": metrics, "stop_reason": None, "elapsed_seconds": None}
+        return metrics
+
+    def finish_site(self, website, stop_reason, elapsed):
+        with self._lock:
+            self.sites[website].update(stop_reason=stop_reason, elapsed_seconds=round(elapsed, 3))
+
+    def write(self, path):
+        with self._lock:
+            sites = {website: {**entry["metrics"].as_dict(), "stop_reason": entry["stop_reason"],
+                               "elapsed_seconds": entry["elapsed_seconds"]} for website, entry in self.sites.items()}
+        data = {"started": self.started.isoformat(timespec="seconds"),
+                "elapsed_seconds": round(time.monotonic() - self._start, 3),
+                **self.total.as_dict(), "sites": sites}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
@@ -1,19 +1,163 @@
 import os, sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
+import atexit, queue, threading, time
 from datetime import datetime
-from core.util.functions.config import config
+from config.settings import get_settings
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEBUG_FILE = os.path.normpath(os.path.join(CURRENT_DIR, "../../../logs", f'{datetime.now().strftime("%Y-%m-%d %H-%M-%S")}-debug.log'))
 os.makedirs(os.path.dirname(DEBUG_FILE), exist_ok=True)
+
+POLL_SECONDS = 0.5  # how often a waiting flush() checks that the writer thread is still running
+WAIT_SECONDS = 10  # longest flush() and close() wait for queued lines to reach the file
+BATCH_SIZE = 1000
+
+_STOP = object()
+
+
+class DebugWriter(threading.Thread):
+    """Background thread that writes queued log lines to DEBUG_FILE in batches.
+
+    Lines are written as soon as the thread picks them up, together with any
+    that queued up meanwhile. The file stays open and is rotated to .1, .2, ...
+    once it reaches `max_bytes`. The queue is bounded, so a stalled disk slows
+    callers down instead of growing memory. If a write or rotation fails, the
+    batch is dropped with one warning on stderr and the file is opened again
+    for the next batch.
+    """
+
+    def __init__(self, path, max_queue, max_bytes, backups):
+        super().__init__(name="debug-writer", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lines = queue.Queue(maxsize=max_queue)
+        self.dropped = 0  # lines lost to write errors
+
+    def write(self, line):
+        if self.is_alive():
+            self.lines.put(line)
+        else:
+            # Closed already (e.g. a late message at exit): write it directly
+            try:
+                with open(self.path, "a", encoding='utf-8') as f:
+                    f.write(line)
+            except OSError:
+                self.dropped += 1
+
+    def flush(self, timeout=WAIT_SECONDS):
+        """Wait until every queued line is written, for at most `timeout` seconds; False if some are still queued."""
+        deadline = time.monotonic() + timeout
+        with self.lines.all_tasks_done:
+            while self.lines.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.is_alive():
+                    return False
+                self.lines.all_tasks_done.wait(min(remaining, POLL_SECONDS))
+        return True
+
+    def close(self, timeout=WAIT_SECONDS):
+        if self.is_alive():
+            try:
+                self.lines.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self.join(timeout)
+
+    def run(self):
+        f = None
+        stopping = False
+        while not stopping:
+            line = self.lines.get()
+            batch = []
+            while True:
+                if line is _STOP:
+                    stopping = True
+                    break
+                batch.append(line)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    line = self.lines.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                f = self._write(f, "".join(batch))
+            except Exception as e:
+                if not self.dropped:
+                    print(f"Cannot write debug log {self.path} ({e}); dropping debug lines until it works again", file=sys.stderr)
+                self.dropped += len(batch)
+                f = self._close(f)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self.lines.task_done()
+        self._close(f)
+
+    def _write(self, f, text):
+        """Append `text` to the open file `f` (or a newly opened one) and return the file to use next."""
+        if f is None:
+            f = open(self.path, "a", encoding='utf-8')
+        f.write(text)
+        f.flush()
+        if self.max_bytes and f.tell() >= self.max_bytes:
+            f = self._close(f)
+            self._rotate()
+        return f
+
+    @staticmethod
+    def _close(f):
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            settings = get_settings()
+            _writer = DebugWriter(DEBUG_FILE, settings.debug_queue_size, settings.debug_max_bytes, settings.debug_backups)
+            _writer.start()
+            # Runs on normal exit, sys.exit() and an unhandled KeyboardInterrupt
+            atexit.register(close_debug)
+        return _writer
+
+
 def debug(*args, **kwargs):
-   
+
     """Custom debug function to log messages if debug mode is enabled."""
-    if config("debug", False):
+    if get_settings().debug:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        message = f"[{timestamp}] " + " ".join(map(str, args))
-        with open(DEBUG_FILE, "a", encoding='utf-8') as f:
-            print(message, **kwargs, file=f)
+        message = f"[{timestamp}] " + kwargs.get("sep", " ").join(map(str, args))
+        _get_writer().write(message + kwargs.get("end", "\n"))
     else:
         pass
+
+
+def flush_debug():
+    """Wait until all queued debug lines are written, for at most WAIT_SECONDS; False if some are still queued."""
+    if _writer is not None:
+        return _writer.flush()
+    return True
+
+
+def close_debug():
+    """Write out queued debug lines and stop the writer thread."""
+    if _writer is not None:
+        _writer.close()
@@ -0,0 +1,231 @@
+import sys
+import math
+import base64
+from array import array
+from hashlib import blake2b
+
+VISITED_INDEXES = ("set", "fingerprint", "bloom")
+SLICE_HEADROOM = 0.9  # a Bloom slice is sized for this share of its error budget, see ScalableBloomFilter
+
+
+def fingerprint(key):
+    """Stable 64-bit fingerprint of a URL key (never 0, which marks an empty slot)."""
+    return int.from_bytes(blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little") or 1
+
+
+class StringSet:
+    """The full keys in a set: exact, and the largest by far (~150 bytes per URL)."""
+
+    def __init__(self):
+        self._keys = set()
+        self._key_bytes = 0
+
+    def add(self, key):
+        """Add `key`; returns False if it was already there."""
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._key_bytes += sys.getsizeof(key)
+        return True
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def memory_bytes(self):
+        return sys.getsizeof(self._keys) + self._key_bytes
+
+    def state(self):
+        return list(self._keys)
+
+    def restore(self, state):
+        if isinstance(state, dict) or any(not isinstance(key, str) for key in state):
+            raise ValueError("The checkpoint was written with another VISITED_INDEX; resume with the same one")
+        for key in state:
+            self.add(key)
+
+
+class FingerprintSet:
+    """64-bit fingerprints of the keys in an open-addressing table backed by one array('Q').
+
+    About 11-23 bytes per URL (the table is 35-70% full), against ~150 for the strings.
+    Two different keys collide with probability ~n^2 / 2^65: under one in a
+    billion for a million URLs on a site. The table doubles at 70% full.
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity=256):
+        self._resize(1 << max(4, int(capacity / self.MAX_LOAD)).bit_length())
+        self._len = 0
+
+    def _resize(self, size):
+        old = getattr(self, "_slots", ())
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._limit = int(size * self.MAX_LOAD)
+        for fp in old:
+            if fp:
+                self._slots[self._find(fp)] = fp
+
+    def _find(self, fp):
+        # Linear probing from the low bits; the slot holding fp, or the empty slot where it would go
+        slots, mask = self._slots, self._mask
+        i = fp & mask
+        while True:
+            found = slots[i]
+            if found == fp or not found:
+                return i
+            i = (i + 1) & mask
+
+    def add_fingerprint(self, fp):
+        i = self._find(fp)
+        if self._slots[i]:
+            return False
+        self._slots[i] = fp
+        self._len += 1
+        if self._len > self._limit:
+            self._resize(len(self._slots) * 2)
+        return True
+
+    def add(self, key):
+        """Add `key`; returns False if it (or a colliding key) was already there."""
+        return self.add_fingerprint(fingerprint(key))
+
+    def __contains__(self, key):
+        return bool(self._slots[self._find(fingerprint(key))])
+
+    def __len__(self):
+        return self._len
+
+    def memory_bytes(self):
+        return sys.getsizeof(self._slots)
+
+    def state(self):
+        return [fp for fp in self._slots if fp]
+
+    def restore(self, state):
+        if isinstance(state, dict):
+            raise ValueError("The checkpoint holds a Bloom filter; resume with VISITED_INDEX=bloom")
+        # A checkpoint written by the string set holds keys; fingerprint them
+        for item in state:
+            self.add_fingerprint(item if isinstance(item, int) else fingerprint(item))
+
+
+class BloomFilter:
+    """One fixed-size Bloom filter sized for `capacity` keys at `error_rate`."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    # Kirsch-Mitzenmacher double hashing: bit i is (h1 + i * h2) mod size, from two 64-bit hashes
+
+    def contains(self, h1, h2):
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False  # most new keys stop at the first or second bit
+        return True
+
+    def add(self, h1, h2):
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """Bloom filters that are added as the previous one fills (Almeida et al., 2007).
+
+    Filter i holds `initial_capacity * growth^i` keys within an error budget
+    of `error_rate * (1 - tightening) * tightening^i`, so the whole index stays
+    under `error_rate` false positives however many URLs a site has, at
+    roughly 1.44 * log2(1 / error_rate) bits per URL (~2-3 bytes at 0.1%).
+    Each filter is sized for SLICE_HEADROOM of its budget: the sizing assumes
+    a fractional number of hashes and a full filter lands around its expected
+    rate, not under it, and with the budgets summing to just under
+    `error_rate` that took a large index past it (0.105% at 1M URLs).
+
+    A false positive makes the crawler treat a new page as already seen and
+    skip it, so this trades a few missed pages for memory. There is no
+    false negative: a page is never fetched twice.
+    """
+
+    def __init__(self, error_rate=0.001, initial_capacity=8192, growth=2, tightening=0.5):
+        if not 0 < error_rate < 1:
+            raise ValueError(f"Bloom error rate must be between 0 and 1, got {error_rate}")
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+        self._len = 0
+
+    def _hashes(self, key):
+        digest = blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def _grow(self):
+        i = len(self.filters)
+        budget = self.error_rate * (1 - self.tightening) * self.tightening ** i
+        self.filters.append(BloomFilter(self.initial_capacity * self.growth ** i, budget * SLICE_HEADROOM))
+
+    def add(self, key):
+        """Add `key`; returns False if it was (probably) already there."""
+        h1, h2 = self._hashes(key)
+        if any(f.contains(h1, h2) for f in self.filters):
+            return False
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            self._grow()
+        self.filters[-1].add(h1, h2)
+        self._len += 1
+        return True
+
+    def __contains__(self, key):
+        h1, h2 = self._hashes(key)
+        return any(f.contains(h1, h2) for f in self.filters)
+
+    def __len__(self):
+        return self._len
+
+    def memory_bytes(self):
+        return sum(sys.getsizeof(f.bits) for f in self.filters)
+
+    def state(self):
+        return {"error_rate": self.error_rate, "count": self._len,
+                "filters": [[f.capacity, f.error_rate, f.count, base64.b64encode(bytes(f.bits)).decode()] for f in self.filters]}
+
+    def restore(self, state):
+        if isinstance(state, list):
+            if any(not isinstance(key, str) for key in state):
+                raise ValueError("The checkpoint holds fingerprints; resume with VISITED_INDEX=fingerprint")
+            # A checkpoint written by the string set holds keys
+            for key in state:
+                self.add(key)
+            return
+        for capacity, error_rate, count, bits in state["filters"]:
+            f = BloomFilter(capacity, error_rate)
+            f.bits = bytearray(base64.b64decode(bits))
+            f.count = count
+            self.filters.append(f)
+        self._len = state["count"]
+
+
+def make_visited_index(kind="fingerprint", error_rate=0.001):
+    """A new, empty index of `kind`: "set", "fingerprint" or "bloom" (with `error_rate`)."""
+    if kind == "set":
+        return StringSet()
+    if kind == "fingerprint":
+        return FingerprintSet()
+    if kind == "bloom":
+        return ScalableBloomFilter(error_rate)
+    raise ValueError(f"Unknown visited index {kind!r}, expected one of {VISITED_INDEXES}")
@@ -0,0 +1,136 @@
+import time
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+class WorkQueue:
+    """Input rows of a distributed crawl in a SQLite file, shared by a coordinator and its workers.
+
+    A worker lease()s a row for `lease_seconds` and renew()s the lease while it
+    crawls; a row whose lease ran out, because its worker died or lost the
+    file, goes to the next worker that asks. complete() stores the row's
+    emails and marks it done in one transaction, and only while the lease is
+    still the caller's, so a row is never counted twice. A row whose lease ran
+    out `max_attempts` times is marked failed and gets no emails. Every
+    lease() and renew() also marks its worker as seen, so the coordinator can
+    tell when no worker is left.
+
+    Every process opens its own connection; the file needs a disk with working
+    locks (a local disk, not most network shares). The methods may be called
+    from any thread, one at a time.
+    """
+
+    def __init__(self, path, lease_seconds=60, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rows ("
+                        "row INTEGER PRIMARY KEY, website TEXT NOT NULL, email_threshold INTEGER NOT NULL,"
+                        "timeout_minutes INTEGER NOT NULL, state TEXT NOT NULL, worker TEXT,"
+                        "lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, note TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results ("
+                        "row INTEGER NOT NULL, position INTEGER NOT NULL, email TEXT NOT NULL, found_url TEXT NOT NULL,"
+                        "PRIMARY KEY (row, position))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, seen REAL NOT NULL)")
+
+    def add_rows(self, jobs):
+        """Queue [(idx, website, email_threshold, timeout_minutes)]; rows already queued keep their state."""
+        with self._transaction():
+            self.db.executemany("INSERT OR IGNORE INTO rows (row, website, email_threshold, timeout_minutes, state) "
+                                "VALUES (?, ?, ?, ?, ?)", [(*job, PENDING) for job in jobs])
+
+    def lease(self, worker):
+        """The next free (idx, website, email_threshold, timeout_minutes) for `worker`, or None."""
+        now = time.time()
+        with self._transaction():
+            # Rows whose worker gave up on them too often are not handed out again
+            self.db.execute("UPDATE rows SET state = ?, worker = NULL, note = 'lease expired too often' "
+                            "WHERE state = ? AND lease_until < ? AND attempts >= ?", (FAILED, LEASED, now, self.max_attempts))
+            found = self.db.execute("SELECT row, website, email_threshold, timeout_minutes FROM rows "
+                                    "WHERE state = ? OR (state = ? AND lease_until < ?) ORDER BY row LIMIT 1",
+                                    (PENDING, LEASED, now)).fetchone()
+            if found:
+                self.db.execute("UPDATE rows SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE row = ?",
+                                (LEASED, worker, now + self.lease_seconds, found[0]))
+            self._seen(worker, now)
+        return found
+
+    def renew(self, idx, worker):
+        """Extend `worker`'s lease on row `idx`; False if the lease was lost to another worker."""
+        now = time.time()
+        with self._transaction():
+            changed = self.db.execute("UPDATE rows SET lease_until = ? WHERE row = ? AND state = ? AND worker = ?",
+                                      (now + self.lease_seconds, idx, LEASED, worker)).rowcount
+            self._seen(worker, now)
+        return changed == 1
+
+    def complete(self, idx, worker, email_to_url, note=None):
+        """Store row `idx`'s [(email, found_url)] and mark it done; False (and nothing stored) if the lease was lost."""
+        with self._transaction():
+            changed = self.db.execute("UPDATE rows SET state = ?, lease_until = NULL, note = ? WHERE row = ? AND state = ? AND worker = ?",
+                                      (DONE, note, idx, LEASED, worker)).rowcount
+            if changed == 1:
+                self.db.executemany("INSERT INTO results VALUES (?, ?, ?, ?)",
+                                    [(idx, position, email, found_url) for position, (email, found_url) in enumerate(email_to_url)])
+        return changed == 1
+
+    def release(self, idx, worker):
+        """Hand row `idx` back unfinished, e.g. when `worker` is stopped; it does not count as an attempt."""
+        with self._transaction():
+            self.db.execute("UPDATE rows SET state = ?, worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0) "
+                            "WHERE row = ? AND state = ? AND worker = ?", (PENDING, idx, LEASED, worker))
+
+    def counts(self):
+        """{state: rows}, every state present."""
+        counts = Counter({state: 0 for state in (PENDING, LEASED, DONE, FAILED)})
+        with self.lock:
+            counts.update(dict(self.db.execute("SELECT state, COUNT(*) FROM rows GROUP BY state")))
+        return counts
+
+    def finished(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM rows WHERE state IN (?, ?)", (PENDING, LEASED)).fetchone()[0] == 0
+
+    def workers(self):
+        """(workers ever seen, workers seen within the last lease period)."""
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*), COALESCE(SUM(seen >= ?), 0) FROM workers",
+                                   (time.time() - self.lease_seconds,)).fetchone()
+
+    def results(self):
+        """{website: [(email, found_url)]} in input row order, as save_all_results() takes it."""
+        all_results = {}
+        with self.lock:
+            for _, website in self.db.execute("SELECT row, website FROM rows WHERE state IN (?, ?) ORDER BY row", (DONE, FAILED)):
+                all_results.setdefault(website, [])
+            for website, email, found_url in self.db.execute("SELECT rows.website, email, found_url FROM results "
+                                                             "JOIN rows USING (row) ORDER BY row, position"):
+                all_results[website].append((email, found_url))
+        return all_results
+
+    def _seen(self, worker, now):
+        self.db.execute("INSERT INTO workers VALUES (?, ?) ON CONFLICT (worker) DO UPDATE SET seen = excluded.seen", (worker, now))
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never lease the same row
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,199 @@
+import argparse, asyncio, os, socket, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from main import CURRENT_DIR, FetchLimits, crawl_site_async, save_all_results
+from config.settings import get_settings
+from core.fetcher import get_fetcher
+from core.site_probe import probe_site, ALIVE, RETRY
+from core.util.functions.debug import debug
+from core.work_queue import WorkQueue, DONE, FAILED, LEASED, PENDING
+
+POLL_SECONDS = 2  # how often an idle worker asks for a row and the coordinator reports
+
+
+class LeaseLost(Exception):
+    """Another worker took over the row, after this worker failed to renew its lease in time."""
+
+def read_jobs(input_csv):
+    df = pd.read_csv(input_csv)
+    return [(idx, row['Website URL'].strip(), int(row['Email Threshold']), int(row['Timeout Threshold (minutes)']))
+            for idx, row in df.iterrows()]
+
+def open_queue(path):
+    return WorkQueue(path, get_settings().work_lease_seconds)
+
+def coordinate(args):
+    """Queue the input rows, optionally start local workers, wait for every row and save the merged results."""
+    queue_path = args.queue or f"{args.input_csv}--emails-queue.sqlite"
+    if not args.resume:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(queue_path + suffix):
+                os.remove(queue_path + suffix)
+    queue = open_queue(queue_path)
+    jobs = read_jobs(args.input_csv)
+    queue.add_rows(jobs)
+    print(f"Queued {len(jobs)} rows in {queue_path}")
+    print(f"Start more workers with: python {os.path.basename(__file__)} worker {queue_path}")
+
+    workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", queue_path], cwd=CURRENT_DIR)
+               for _ in range(args.workers)]
+    try:
+        last = None
+        while not queue.finished():
+            counts = queue.counts()
+            status = (f"{counts[DONE] + counts[FAILED]}/{len(jobs)} rows done "
+                      f"({counts[FAILED]} failed), {counts[LEASED]} leased, {counts[PENDING]} pending")
+            if status != last:
+                print(status, flush=True)
+                last = status
+            seen, live = queue.workers()
+            if (workers or seen) and live == 0 and all(worker.poll() is not None for worker in workers):
+                # Every worker exited or has not been heard from for a lease period; nothing will finish the rows
+                left = counts[LEASED] + counts[PENDING]
+                print(f"All workers stopped with {left} rows left. Start workers and run the coordinator again "
+                      f"with --resume to continue from {queue_path}")
+                queue.close()
+                sys.exit(1)
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        # Local workers get the same Ctrl-C and hand their rows back
+        print(f"\nPaused. Run the coordinator again with --resume to continue from {queue_path}")
+        for worker in workers:
+            worker.wait()
+        queue.close()
+        return
+    for worker in workers:
+        worker.wait()
+
+    save_all_results(queue.results())
+    queue.close()
+
+def in_thread(db, method, *args):
+    """Await `method(*args)` on the queue's own thread `db`, off the event loop."""
+    return asyncio.wrap_future(db.submit(method, *args))
+
+async def renewing(queue, db, idx, worker_id, work):
+    """Await the future `work` while renewing the lease on row `idx` every third of it; cancels it and raises
+    LeaseLost if the row went to another worker."""
+    try:
+        while not work.done():
+            await asyncio.wait([work], timeout=queue.lease_seconds / 3)
+            if not work.done() and not await in_thread(db, queue.renew, idx, worker_id):
+                work.cancel()
+                raise LeaseLost()
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    return work.result()
+
+async def crawl_row(queue, db, worker_id, job, limits):
+    """Crawl one leased row like main.py does, renewing the lease until it stops, and push its results."""
+    settings = get_settings()
+    idx, website, email_threshold, timeout_minutes = job
+    print(f"\n[{idx+1}] {worker_id} crawling: {website}")
+    try:
+        start_url = None
+        if settings.probe_sites:
+            probe = await renewing(queue, db, idx, worker_id, asyncio.get_running_loop().run_in_executor(
+                limits.executor, probe_site, website, settings.probe_timeout))
+            if probe.status == RETRY:
+                # The lease runs out and the row is probed again later, up to the queue's max attempts
+                print(f"[{idx+1}] Leaving {website} for later: {probe.reason}")
+                return
+            if probe.status != ALIVE:
+                print(f"[{idx+1}] Skipping {website}: {probe.status} ({probe.reason})")
+                await in_thread(db, queue.complete, idx, worker_id, [], f"{probe.status}: {probe.reason}")
+                return
+            start_url = probe.final_url
+
+        email_to_url = []
+        note = None
+        try:
+            await renewing(queue, db, idx, worker_id, asyncio.ensure_future(crawl_site_async(
+                website, email_threshold, timeout_minutes, email_to_url, limits, start_url=start_url)))
+        except LeaseLost:
+            raise
+        except Exception as e:
+            note = f"crawl error: {e}"
+            debug(f"Crawl of {website} failed: {e}")
+        if await in_thread(db, queue.complete, idx, worker_id, email_to_url, note):
+            print(f"[{idx+1}] Done: {website}, {len(email_to_url)} emails")
+        else:
+            print(f"[{idx+1}] Lease on {website} expired before it finished; results dropped")
+    except LeaseLost:
+        # Another worker has the row now; its results are the ones kept
+        print(f"[{idx+1}] Lost the lease on {website}, dropping it")
+    except asyncio.CancelledError:
+        # Runs after any queue call still in flight; a row completed meanwhile stays done
+        db.submit(queue.release, idx, worker_id)
+        raise
+
+def release_late_lease(queue, worker_id, leasing):
+    """Done callback of a lease() whose caller was cancelled: hand the row it got straight back."""
+    if not leasing.cancelled() and leasing.exception() is None and leasing.result():
+        queue.release(leasing.result()[0], worker_id)
+
+async def work_async(queue, worker_id):
+    limits = FetchLimits()
+    # One thread for every queue call: a transaction can wait up to the connection's timeout for another
+    # worker's write lock, and calls on it run in the order they were made
+    db = ThreadPoolExecutor(1, thread_name_prefix="work-queue")
+
+    async def site_slot():
+        while True:
+            leasing = db.submit(queue.lease, worker_id)
+            try:
+                job = await asyncio.wrap_future(leasing)
+            except asyncio.CancelledError:
+                leasing.add_done_callback(lambda leasing: release_late_lease(queue, worker_id, leasing))
+                raise
+            if job:
+                await crawl_row(queue, db, worker_id, job, limits)
+            elif await in_thread(db, queue.finished):
+                return
+            else:
+                # Rows leased by other workers come back here if their lease runs out
+                await asyncio.sleep(POLL_SECONDS)
+
+    try:
+        await asyncio.gather(*(site_slot() for _ in range(get_settings().site_concurrency)))
+    finally:
+        # Lets the releases of a stopped worker reach the file before it is closed
+        db.shutdown(wait=True)
+        limits.close()
+
+def work(args):
+    """Lease rows from the queue and crawl them, site_concurrency at a time, until none are left."""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    queue = open_queue(args.queue)
+    print(f"Worker {worker_id} on {args.queue}")
+    try:
+        asyncio.run(work_async(queue, worker_id))
+    except KeyboardInterrupt:
+        print(f"\nWorker {worker_id} stopped; its unfinished rows are back in the queue")
+    finally:
+        queue.close()
+    print(get_fetcher().stats.summary())
+    debug(get_fetcher().stats.summary())
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl websites for emails with a coordinator and any number of workers sharing a SQLite queue')
+    commands = parser.add_subparsers(dest='command', required=True)
+    coordinator = commands.add_parser('coordinator', help='Queue the input rows and merge the results once all are done')
+    coordinator.add_argument('input_csv', nargs='?', default=os.path.join(CURRENT_DIR, "website_input.csv"))
+    coordinator.add_argument('--queue', help='Queue file (default: next to the input)')
+    coordinator.add_argument('--workers', type=int, default=0, help='Worker processes to start on this machine')
+    coordinator.add_argument('--resume', action='store_true', help='Keep the existing queue and its finished rows')
+    worker = commands.add_parser('worker', help='Crawl rows from a queue until none are left')
+    worker.add_argument('queue', help='Queue file made by the coordinator')
+    args = parser.parse_args()
+    if args.command == 'worker' and not os.path.exists(args.queue):
+        parser.error(f"no queue at {args.queue}; start the coordinator first")
+    if args.command == 'coordinator':
+        coordinate(args)
+    else:
+        work(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,27 @@
-import requests, re, csv, sys, os, time, json
-from urllib.parse import urljoin, urlparse
-from collections import deque, defaultdict
+import csv, sys, os, time, asyncio, codecs, argparse, functools, threading, traceback
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 import pandas as pd
 
 # Setup path for debug
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 from core.util.functions.debug import debug
-from core.util.functions.config import config
-from core.util.functions.env import env
+from config.settings import get_settings
+from core.fetcher import get_fetcher, capture_stages
+from core.politeness import Throttled
+from core.util.functions.canonical_url import canonicalize_url, site_host, url_key
+from core.frontier import Frontier
+from core.page_scanner import PageScanner, TimedPageScanner
+from core.result_writer import ResultWriter
+from core.checkpoint import CheckpointStore
+from core.site_seeds import discover_seeds
+from core.site_probe import probe_sites, ALIVE, RETRY
+from core.visited_index import FingerprintSet
+from core.stage_metrics import RunMetrics
+from core.progress import CrawlProgress, MetricsServer, Dashboard
+from core.extract_pool import ExtractPool, resolve_links
 
 interrupted = False
 
@@ -16,31 +29,22 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.normpath(os.path.join(CURRENT_DIR, "exports"))
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
-EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
 VALID_PAGE_EXTENSIONS = { '', '.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.jspx', '.cfm', '.cgi', '.pl', '.xhtml', '.shtml' }
 
-DISABLE_TARGET_FILTER = env("DISABLE_TARGET_USERNAMES", "false").lower() == "true"
-# TARGETS = config("target-usernames")
-# DO_NOT_ALLOW = config("do-not-allow-in-username")
-# EXCLUDE_EXTENSIONS = config("exclude-extensions")
+CHUNK_SIZE = 16384
 
-with open(os.path.join(CURRENT_DIR, "config.json")) as f:
-    CONFIG = json.load(f)
-
-TARGETS = CONFIG.get("target-usernames", [])
-DO_NOT_ALLOW = CONFIG.get("do-not-allow-in-username", [])
-EXCLUDE_EXTENSIONS = CONFIG.get("exclude-extensions", [])
+SITEMAP_PRIORITY_WEIGHT = 4  # score bonus for a sitemap <priority> of 1.0, next to the keyword weights
 
 def should_skip(url):
     path = urlparse(url).path.lower()
     ext = os.path.splitext(path)[1]
-    return ext in EXCLUDE_EXTENSIONS or (ext and ext not in VALID_PAGE_EXTENSIONS)
+    return ext in get_settings().exclude_extensions or (ext and ext not in VALID_PAGE_EXTENSIONS)
 
 def is_valid_email(email):
-    if DISABLE_TARGET_FILTER:
+    settings = get_settings()
+    if settings.disable_target_filter:
         return True
-    username = email.split('@')[0].lower()
-    return any(t in username for t in TARGETS) and not any(x in username for x in DO_NOT_ALLOW)
+    return settings.email_filter.is_valid(email)
 
 def save_all_results(all_results):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -56,95 +60,508 @@ def save_all_results(all_results):
     print(f"\nSaved results to {export_path}")
     debug(f"Saved results to {export_path}")
 
-def crawl_site(website_url, email_threshold, timeout_minutes):
-    queue = deque([(website_url, 0)])
-    visited = set()
+def save_metrics(metrics):
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    export_path = os.path.join(EXPORT_DIR, f"{timestamp}_metrics.json")
+    metrics.write(export_path)
+    print(f"Stages: {metrics.total.summary()}")
+    print(f"Saved stage metrics to {export_path}")
+    debug(f"Stages: {metrics.total.summary()}")
+    debug(f"Saved stage metrics to {export_path}")
+
+def save_probe_report(jobs, probes):
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    export_path = os.path.join(EXPORT_DIR, f"{timestamp}_probe.csv")
+    with open(export_path, "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["#", "Website URL", "Status", "HTTP Status", "Final URL", "Crawl Domain", "Seconds", "Reason"])
+        for idx, website, *_ in jobs:
+            p = probes[website]
+            writer.writerow([idx + 1, website, p.status, p.http_status or "", p.final_url, p.crawl_domain, f"{p.seconds:.2f}", p.reason])
+    print(f"\nSaved probe report to {export_path}")
+    debug(f"Saved probe report to {export_path}")
+
+class FetchLimits:
+    """Global and per-host caps on in-flight requests, shared by every site in a run.
+
+    With EXTRACT_WORKERS set it also holds the ExtractPool the pages are scanned in.
+    """
+
+    def __init__(self, global_limit=None, per_host_limit=None):
+        settings = get_settings()
+        global_limit = global_limit or settings.global_concurrency
+        per_host_limit = per_host_limit or settings.per_host_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=global_limit)
+        self.global_slots = asyncio.Semaphore(global_limit)
+        self.per_host_limit = per_host_limit
+        self.host_slots = {}
+        workers = settings.extract_workers
+        # A body slot for every fetch plus two queued per worker; fetches wait for one beyond that
+        self.extract = ExtractPool(workers, global_limit + 2 * workers) if workers else None
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        # Wait for the host first so a busy host does not hold global slots
+        async with self.host_slots[host]:
+            async with self.global_slots:
+                yield
+
+    def close(self):
+        # Threads still blocked in a request finish on their own
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.extract:
+            self.extract.close()
+
+class SkippedPage(Exception):
+    pass
+
+def fetch_page(url, metrics=None, reserved=False):
+    """Stream `url` through a PageScanner, reading at most max-page-bytes of an HTML body.
+
+    With `metrics` (a StageMetrics) the page's stage timings are added to it. `reserved`
+    means the caller already waited for the politeness scheduler (see fetch_page_async).
+    """
+    if metrics is not None:
+        return _fetch_page_timed(url, metrics, reserved)
+    with get_fetcher().get(url, stream=True, reserved=reserved) as r:
+        return _scan_response(r, PageScanner())
+
+def _fetch_page_timed(url, metrics, reserved=False):
+    stages = capture_stages()
+    start = time.monotonic()
+    try:
+        with get_fetcher().get(url, stream=True, reserved=reserved) as r:
+            # Time to the response headers, less the throttle wait and connection setup counted on their own
+            stages["ttfb"] = time.monotonic() - start - sum(stages.values())
+            body_start = time.monotonic()
+            try:
+                return _scan_response(r, TimedPageScanner(stages))
+            finally:
+                stages["body"] = time.monotonic() - body_start - stages["emails"] - stages["links"]
+    finally:
+        metrics.add_all(stages, fetches=1)
+
+def _check_content_type(r):
+    # Reject PDFs, images, JSON etc. from the headers, before any of the body is read
+    content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in get_settings().html_content_types:
+        raise SkippedPage(f"content type {content_type}")
+
+def _scan_response(r, scanner):
+    max_page_bytes = get_settings().max_page_bytes
+    _check_content_type(r)
+
+    decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+    received = 0
+    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+        if max_page_bytes and received + len(chunk) > max_page_bytes:
+            scanner.feed(decoder.decode(chunk[:max_page_bytes - received]))
+            return scanner.close(truncated=True)
+        received += len(chunk)
+        scanner.feed(decoder.decode(chunk))
+    scanner.feed(decoder.decode(b"", final=True))
+    return scanner.close()
+
+def read_page_body(url, extract, slot, metrics=None, reserved=True):
+    """Read at most max-page-bytes of `url`'s HTML body into `slot` of the ExtractPool `extract`.
+
+    Returns (extract.read_into()'s result, encoding) for the worker that scans it. Only
+    called from fetch_page_async, which has already waited for the politeness scheduler
+    unless `reserved` is False.
+    """
+    stages = capture_stages() if metrics is not None else None
+    start = time.monotonic()
+    try:
+        with get_fetcher().get(url, stream=True, reserved=reserved) as r:
+            if stages is not None:
+                stages["ttfb"] = time.monotonic() - start - sum(stages.values())
+            body_start = time.monotonic()
+            _check_content_type(r)
+            body = extract.read_into(slot, r.iter_content(chunk_size=CHUNK_SIZE), get_settings().max_page_bytes)
+            if stages is not None:
+                stages["body"] = time.monotonic() - body_start
+            return body, r.encoding or "utf-8"
+    finally:
+        if metrics is not None:
+            metrics.add_all(stages, fetches=1)
+
+async def fetch_page_async(url, limits, metrics=None, domain=None):
+    """Fetch and scan `url`. With an ExtractPool in `limits` its links come back resolved and on `domain`."""
+    fetcher = get_fetcher()
+    scheduler = fetcher.scheduler
+    if scheduler and fetcher.cache and await asyncio.get_running_loop().run_in_executor(limits.executor, fetcher.cache.fresh, url):
+        # A cache hit sends no request, so it takes no politeness slot; should the entry
+        # expire before the fetch, fetcher.request() waits for the scheduler in the thread
+        scheduler = None
+    for attempt in range(fetcher.retries + 1):
+        if scheduler:
+            # Wait out a slow or throttled host here, not while holding a fetch thread or one of the shared slots
+            throttle_start = time.monotonic()
+            while True:
+                await asyncio.sleep(scheduler.reserve(url))
+                if scheduler.start(url):
+                    break
+            if metrics:
+                metrics.add("throttle", time.monotonic() - throttle_start)
+        try:
+            if limits.extract:
+                read_body = read_page_body if scheduler else functools.partial(read_page_body, reserved=False)
+                return await limits.extract.fetch(url, domain, limits, read_body, metrics)
+            async with limits.slot(url):
+                return await asyncio.get_running_loop().run_in_executor(limits.executor, fetch_page, url, metrics, scheduler is not None)
+        except Throttled:
+            # The 429/503 parked the host; the next reserve() waits that out on the loop
+            if attempt == fetcher.retries:
+                raise
+
+async def crawl_site_async(website_url, email_threshold, timeout_minutes, email_to_url, limits, concurrency=None, checkpoint=None,
+                           start_url=None, metrics=None, progress=None):
+    """Crawl with up to `concurrency` pages in flight; appends (email, found_url) to `email_to_url`.
+
+    The crawl starts at `start_url` (default `website_url`) and stays on its host, so a site the
+    probe found redirecting to another domain is crawled on that domain.
+
+    With `metrics` (a RunMetrics) every stage of every page is timed into it, and a
+    `progress` (a SiteProgress) is kept up to date for the dashboard and /metrics.
+
+    With a `checkpoint` (see core/checkpoint.py) the crawl continues from its saved state, saves
+    it every CHECKPOINT_INTERVAL seconds and again if the crawl is interrupted.
+    """
+    settings = get_settings()  # read once per site, so reload_settings() applies from the next site
+    concurrency = concurrency or settings.crawl_concurrency
+    frontier = Frontier(settings.frontier_mode, settings.frontier_keywords, settings.frontier_depth_penalty, settings.frontier_max_size,
+                        settings.visited_index, settings.visited_false_positive_rate)
+    variants = FingerprintSet()  # raw link forms seen, to count fetches the keys saved
+    variants.add(website_url)
+    skipped_variants = 0
     found_emails = set()
-    email_to_url = []
-    domain = urlparse(website_url).netloc
+    pages_fetched = 0
+    threshold_page = None  # pages fetched when the email threshold was reached
+    start_url = start_url or website_url
+    domain = site_host(start_url)
+    site_metrics = metrics.site(website_url) if metrics else None
     timeout_secs = timeout_minutes * 60
-    start_time = time.time()
+    elapsed = 0
 
-    try:
-        while queue and (time.time() - start_time) < timeout_secs and len(found_emails) < email_threshold:
-            current_url, level = queue.popleft()
-            if current_url in visited or should_skip(current_url):
+    state = checkpoint.load() if checkpoint else None
+    if state:
+        frontier.restore(state["frontier"])
+        found_emails = set(state["emails"])
+        pages_fetched = state["pages"]
+        elapsed = state["elapsed"]
+        debug(f"Resuming {website_url} after {pages_fetched} pages, {len(found_emails)} emails, {elapsed:.0f}s: {frontier.summary()}")
+    else:
+        frontier.push(canonicalize_url(start_url), 0, key=url_key(start_url))
+    # The timeout budget counts time spent before a resume and on robots.txt and sitemaps
+    start_time = time.time() - elapsed
+    robots = None
+    if settings.seed_sitemaps:
+        # Sitemap URLs are already in a restored frontier; robots.txt is needed either way
+        deadline = time.monotonic() + timeout_secs - elapsed
+        stop = threading.Event()
+        try:
+            robots, seeds = await asyncio.get_running_loop().run_in_executor(
+                limits.executor, discover_seeds, start_url, settings.sitemap_max_urls, not state, deadline, stop)
+        except asyncio.CancelledError:
+            # Interrupted: the thread stops reading sitemaps at its next chunk
+            stop.set()
+            raise
+        queued = 0
+        for url, priority in seeds:
+            if site_host(url) != domain or should_skip(url) or not robots.can_fetch("*", url):
                 continue
-            visited.add(current_url)
-            try:
-                r = requests.get(current_url, timeout=10)
-                text = r.text
-                if int(env("DEBUG_LEVEL", 1)) >= 2:
-                    debug(f"Fetched: {current_url}\n{text[:200]}")
-            except Exception as e:
-                debug(f"Request failed: {current_url} -> {e}")
+            key = url_key(url)
+            if key not in frontier:
+                queued += frontier.push(canonicalize_url(url), 1, key=key, boost=priority * SITEMAP_PRIORITY_WEIGHT)
+        debug(f"Seeded {queued} of {len(seeds)} sitemap URLs for {website_url}")
+    last_checkpoint = time.time()
+
+    in_flight = {}  # task -> (url, level), kept in dispatch (BFS) order
+
+    def save_checkpoint():
+        # Pages still in flight are fetched again after a resume
+        checkpoint.save({"frontier": frontier.state(requeue=in_flight.values()), "emails": sorted(found_emails),
+                         "pages": pages_fetched, "elapsed": time.time() - start_time})
+
+    finished = False
+    try:
+        while (frontier or in_flight) and (time.time() - start_time) < timeout_secs and len(found_emails) < email_threshold:
+            # Dispatch in frontier order; in bfs mode a level is always sent out before the next one
+            while frontier and len(in_flight) < concurrency:
+                current_url, level = frontier.pop()
+                in_flight[asyncio.ensure_future(fetch_page_async(current_url, limits, site_metrics, domain))] = (current_url, level)
+            if progress:
+                progress.frontier, progress.in_flight = len(frontier), len(in_flight)
+
+            if not in_flight:
                 continue
 
-            for email in set(EMAIL_REGEX.findall(text)):
-                if is_valid_email(email) and email not in found_emails:
-                    found_emails.add(email)
-                    email_to_url.append((email, current_url))
+            remaining = timeout_secs - (time.time() - start_time)
+            done, _ = await asyncio.wait(in_flight, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED)
+
+            for future in [f for f in in_flight if f in done]:
+                current_url, level = in_flight.pop(future)
+                try:
+                    page = future.result()
+                    if settings.debug_level >= 2:
+                        debug(f"Fetched: {current_url}\n{page.head}")
+                    if page.truncated:
+                        debug(f"Truncated {current_url} at {settings.max_page_bytes} bytes")
+                except SkippedPage as e:
+                    debug(f"Skipped {current_url}: {e}")
+                    continue
+                except Exception as e:
+                    debug(f"Request failed: {current_url} -> {e}")
+                    if progress:
+                        progress.error(type(e).__name__)
+                    continue
+                pages_fetched += 1
+
+                for email in set(page.emails):
+                    if is_valid_email(email) and email not in found_emails:
+                        found_emails.add(email)
+                        email_to_url.append((email, current_url))
 
-            for link in re.findall(r'href=["\'](.*?)["\']', text):
-                absolute = urljoin(current_url, link)
-                parsed = urlparse(absolute)
-                if parsed.netloc == domain and absolute not in visited:
-                    queue.append((absolute, level + 1))
+                parse_start = time.monotonic() if site_metrics else 0
+                links = page.links if limits.extract else resolve_links(page.links, current_url, domain)
+                for absolute, anchor_text in links:
+                    if should_skip(absolute):
+                        continue
+                    if robots and not robots.can_fetch("*", absolute):
+                        continue
+                    key = url_key(absolute)
+                    new_variant = variants.add(absolute)
+                    if key not in frontier:
+                        frontier.push(canonicalize_url(absolute), level + 1, anchor_text, key=key)
+                    elif new_variant:
+                        # A fragment/scheme/www/slash variant the raw-URL crawl would have fetched again
+                        skipped_variants += 1
+                if site_metrics:
+                    site_metrics.add("url_parse", time.monotonic() - parse_start)
+                if progress:
+                    progress.page(len(found_emails))
+                    progress.frontier, progress.in_flight = len(frontier), len(in_flight)
 
-            debug(f"Checked {current_url} | Level {level} | Emails found: {len(found_emails)}")
+                debug(f"Checked {current_url} | Level {level} | Emails found: {len(found_emails)}")
 
+                if len(found_emails) >= email_threshold:
+                    threshold_page = pages_fetched
+                    break
+
+            if checkpoint and settings.checkpoint_interval and time.time() - last_checkpoint >= settings.checkpoint_interval:
+                save_checkpoint()
+                last_checkpoint = time.time()
+
+        finished = True
+        reason = None
+        if not frontier and not in_flight:
+            reason = "No more URLs to search."
+        elif time.time() - start_time >= timeout_secs:
+            reason = "Timeout threshold reached."
+        elif len(found_emails) >= email_threshold:
+            reason = "Email count threshold reached."
+        if reason:
+            debug(f"Stopped crawling {website_url}: {reason}")
+        if site_metrics:
+            debug(f"Stages for {website_url}: {site_metrics.summary()}")
+            metrics.finish_site(website_url, reason, time.time() - start_time)
+        debug(f"Canonical URLs saved {skipped_variants} fetches of duplicate variants on {website_url}")
+        debug(f"Frontier for {website_url}: {frontier.summary()}")
+
+        if threshold_page is not None:
+            stats = f"Frontier {settings.frontier_mode}: {website_url} reached {email_threshold} emails after {threshold_page} pages"
+        else:
+            stats = f"Frontier {settings.frontier_mode}: {website_url} found {len(found_emails)}/{email_threshold} emails in {pages_fetched} pages"
+        debug(stats)
+        if settings.frontier_stats:
+            print(stats)
+
+    finally:
+        if checkpoint and not finished:
+            save_checkpoint()
+        # Pending pages are abandoned once the site stops
+        for future in in_flight:
+            future.cancel()
+
+    return email_to_url
+
+async def _crawl_site_standalone(website_url, email_threshold, timeout_minutes, email_to_url):
+    concurrency = get_settings().crawl_concurrency
+    limits = FetchLimits(concurrency, concurrency)
+    try:
+        await crawl_site_async(website_url, email_threshold, timeout_minutes, email_to_url, limits)
+    finally:
+        limits.close()
+
+def crawl_site(website_url, email_threshold, timeout_minutes):
+    email_to_url = []
+    try:
+        asyncio.run(_crawl_site_standalone(website_url, email_threshold, timeout_minutes, email_to_url))
     except KeyboardInterrupt:
         global interrupted
         interrupted = True
         debug("Interrupted during crawl of: " + website_url)
-        return email_to_url
+    return email_to_url
 
-    if not queue:
-        debug(f"Stopped crawling {website_url}: No more URLs to search.")
-    elif time.time() - start_time >= timeout_secs:
-        debug(f"Stopped crawling {website_url}: Timeout threshold reached.")
-    elif len(found_emails) >= email_threshold:
-        debug(f"Stopped crawling {website_url}: Email count threshold reached.")
+async def crawl_all(jobs, writer, checkpoints, start_urls=None, metrics=None, progress=None):
+    """Crawl `jobs` [(idx, website, email_threshold, timeout_minutes)], site_concurrency at a time.
 
-    return email_to_url
+    `start_urls` maps a website to the URL its crawl starts from, e.g. where the probe was redirected.
 
-# Read from CSV
-input_csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(CURRENT_DIR, "website_input.csv")
-df = pd.read_csv(input_csv)
-all_results = defaultdict(list)
+    Each row's emails are journaled by `writer` as they are found and the row is
+    marked done once its crawl stops; unfinished rows keep their crawl state in
+    `checkpoints`, so partial progress survives an interrupt or crash. A row whose
+    crawl raises is logged and left unfinished; returns those rows.
+    """
+    start_urls = start_urls or {}
+    limits = FetchLimits()
+    site_slots = asyncio.Semaphore(get_settings().site_concurrency)
 
-RESUME_FILE = f"{input_csv}--emails-resume.txt"
-resume_from = 0
+    async def run_job(idx, website, email_threshold, timeout_threshold):
+        async with site_slots:
+            print(f"\n[{idx+1}] Crawling: {website}")
+            email_to_url = writer.start(idx, website)
+            checkpoint = checkpoints.site(idx, website)
+            site_progress = progress.start_site(idx, website, timeout_threshold) if progress else None
+            try:
+                await crawl_site_async(website, email_threshold, timeout_threshold, email_to_url, limits, checkpoint=checkpoint,
+                                       start_url=start_urls.get(website), metrics=metrics, progress=site_progress)
+            except Exception as e:
+                # The row is left without a "done" event, so --resume crawls it again; the other rows go on
+                print(f"[{idx+1}] Crawl of {website} failed: {type(e).__name__}: {e}")
+                debug(f"Crawl of {website} failed: {traceback.format_exc()}")
+                failed.append(idx)
+                if progress:
+                    progress.fail_site(site_progress)
+                return
+            writer.done(idx, website)
+            checkpoint.clear()
+            if progress:
+                progress.finish_site(site_progress)
 
-if os.path.exists(RESUME_FILE):
-    print(f"\nResume file found: {RESUME_FILE}")
-    choice = input("Do you want to resume from last stopped index? (y/n): ").strip().lower()
-    if choice == 'y':
-        with open(RESUME_FILE) as f:
-            resume_from = int(f.read().strip())
+    failed = []
+    try:
+        await asyncio.gather(*(run_job(*job) for job in jobs))
+    finally:
+        limits.close()
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl websites for emails')
+    parser.add_argument('input_csv', nargs='?', default=os.path.join(CURRENT_DIR, "website_input.csv"))
+    parser.add_argument('--resume', action='store_true', help='Continue the last interrupted run on this input, mid-site')
+    args = parser.parse_args()
+    input_csv = args.input_csv
+    df = pd.read_csv(input_csv)
+
+    JOURNAL_FILE = f"{input_csv}--emails-journal.csv"
+    CHECKPOINT_FILE = f"{input_csv}--emails-checkpoint.sqlite"
+
+    if not args.resume and os.path.exists(JOURNAL_FILE):
+        print(f"\nResume file found: {JOURNAL_FILE}")
+        print("Starting over. Run with --resume to continue from where it stopped.")
 
-for idx, row in df.iterrows():
-    if idx < resume_from:
-        continue
+    settings = get_settings()
+    writer = ResultWriter(JOURNAL_FILE, args.resume, settings.results_fsync_rows, settings.results_fsync_interval)
+    checkpoints = CheckpointStore(CHECKPOINT_FILE, args.resume)
 
-    website = row['Website URL'].strip()
-    email_threshold = int(row['Email Threshold'])
-    timeout_threshold = int(row['Timeout Threshold (minutes)'])
-    print(f"\n[{idx+1}] Crawling: {website}")
-    results = []
+    jobs = []
+    for idx, row in df.iterrows():
+        # Rows the journal has as done, whether the last run was paused or killed
+        if idx in writer.finished:
+            continue
 
+        website = row['Website URL'].strip()
+        email_threshold = int(row['Email Threshold'])
+        timeout_threshold = int(row['Timeout Threshold (minutes)'])
+        jobs.append((idx, website, email_threshold, timeout_threshold))
+
+    progress = monitors = None
+    if settings.metrics_port or settings.dashboard_interval:
+        progress = CrawlProgress(settings.site_concurrency, get_fetcher())
+        progress.add_rows(jobs)
+        monitors = []
+        if settings.metrics_port:
+            monitors.append(MetricsServer(progress, port=settings.metrics_port).start())
+            print(f"Metrics at {monitors[-1].url}")
+        if settings.dashboard_interval:
+            monitors.append(Dashboard(progress, settings.dashboard_interval))
+            monitors[-1].start()
+
+    metrics = RunMetrics() if settings.stage_metrics else None
+    retry_rows = 0
     try:
-        results = crawl_site(website, email_threshold, timeout_threshold)
+        live_jobs, start_urls = jobs, {}
+        if settings.probe_sites and jobs:
+            print(f"\nProbing {len(jobs)} sites...")
+            probes = probe_sites([website for _, website, *_ in jobs], settings.probe_concurrency, settings.probe_timeout)
+            save_probe_report(jobs, probes)
+            live_jobs = []
+            for job in jobs:
+                idx, website = job[:2]
+                probe = probes[website]
+                if probe.status == RETRY:
+                    # Not journaled, so --resume probes it again
+                    print(f"[{idx+1}] Leaving {website} for a later run: {probe.reason}")
+                    retry_rows += 1
+                    if progress:
+                        progress.skip_row(idx)
+                    continue
+                if probe.status != ALIVE:
+                    # Recorded as done with no emails, so the row keeps its Website-# and is not probed again on --resume
+                    print(f"[{idx+1}] Skipping {website}: {probe.status} ({probe.reason})")
+                    writer.start(idx, website)
+                    writer.done(idx, website)
+                    if progress:
+                        progress.skip_row(idx)
+                    continue
+                if probe.redirected:
+                    print(f"[{idx+1}] {website} redirects to {probe.final_url}, crawling {probe.crawl_domain}")
+                start_urls[website] = probe.final_url
+                live_jobs.append(job)
+            print(f"{len(live_jobs)} of {len(jobs)} sites alive")
+            debug(f"Probe: {len(live_jobs)} of {len(jobs)} sites alive")
+
+        failed = asyncio.run(crawl_all(live_jobs, writer, checkpoints, start_urls, metrics, progress))
+        if failed:
+            print(f"\n{len(failed)} sites failed to crawl (rows {', '.join(str(idx + 1) for idx in failed)}); "
+                  f"run again with --resume to retry them")
+        if retry_rows:
+            print(f"\n{retry_rows} sites could not be reached or answered 403, 429 or 5xx to the probe; run again with --resume to retry them")
     except KeyboardInterrupt:
-        print(f"\nPaused. Resume info saved to {RESUME_FILE}")
-        with open(RESUME_FILE, 'w') as f:
-            f.write(str(idx))
-        all_results[website].extend(results)  # `results` still has scraped emails
-        break
+        # Rows run out of order; --resume crawls every row the journal does not have as done
+        unfinished = [idx for idx, *_ in jobs if idx not in writer.finished]
+        if unfinished:
+            print(f"\nPaused. Progress saved to {JOURNAL_FILE}; run again with --resume to continue")
+            debug("Interrupted before finishing row: " + str(unfinished[0]))
+    finally:
+        writer.close()
+        checkpoints.close()
+        for monitor in monitors or ():
+            monitor.stop()
 
-    all_results[website].extend(results)
-    if interrupted:
-        break
+    # The journal is ordered by input row, so the numbering matches an uninterrupted run
+    save_all_results(writer.results())
+    if all(idx in writer.finished for idx, *_ in jobs):
+        os.remove(JOURNAL_FILE)
+        os.remove(CHECKPOINT_FILE)
 
+    print(get_fetcher().stats.summary())
+    debug(get_fetcher().stats.summary())
+    if get_fetcher().cache:
+        print(get_fetcher().cache.stats.summary())
+        debug(get_fetcher().cache.stats.summary())
+    if get_fetcher().scheduler:
+        print(get_fetcher().scheduler.summary())
+        debug(get_fetcher().scheduler.summary())
+    if get_fetcher().dns:
+        print(get_fetcher().dns.stats.summary())
+        debug(get_fetcher().dns.stats.summary())
+    if metrics:
+        save_metrics(metrics)
 
-save_all_results(all_results)
+if __name__ == "__main__":
+    main()
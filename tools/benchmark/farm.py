@@ -0,0 +1,162 @@
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SLUGS = ["contact-us", "about", "team", "careers", "products", "services", "news", "blog", "projects", "gallery"]
+EMAIL_SLUGS = {"contact-us": 6, "about": 4, "team": 4, "careers": 3}  # where real sites put their addresses
+USERNAMES = ["info", "sales", "admin", "hr"]  # pass every crawler's generic-email filter
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt".split()
+
+
+class Page:
+    def __init__(self, number, path, level):
+        self.number = number
+        self.path = path
+        self.level = level
+        self.children = []
+        self.email = None
+        self.slow = False
+        self.error = False
+
+
+class SyntheticSite:
+    """A deterministic site tree: `fanout` links per page down to `depth` levels below the home page.
+
+    `emails` planted addresses go on distinct pages, preferring contact/about-style
+    paths. Every child link is repeated in `duplicates` variant forms (fragment,
+    tracking parameter, trailing slash, absolute URL) that a naive crawler fetches
+    again. `slow_ratio` of pages answer after an extra `slow_delay` seconds and
+    `error_ratio` of them with a 500.
+    """
+
+    def __init__(self, index, depth=3, fanout=5, page_kb=20, emails=20, duplicates=2,
+                 slow_ratio=0.05, slow_delay=1.0, error_ratio=0.02, seed=1):
+        rng = random.Random(f"{seed}-{index}")
+        self.index = index
+        self.page_kb = page_kb
+        self.duplicates = duplicates
+        self.slow_delay = slow_delay
+        self.pages = {"/": Page(0, "/", 0)}
+        level_pages = [self.pages["/"]]
+        for level in range(1, depth + 1):
+            next_level = []
+            for parent in level_pages:
+                for _ in range(fanout):
+                    number = len(self.pages)
+                    page = Page(number, f"/{rng.choice(SLUGS)}-{number}", level)
+                    page.slow = rng.random() < slow_ratio
+                    page.error = rng.random() < error_ratio
+                    parent.children.append(page)
+                    self.pages[page.path] = page
+                    next_level.append(page)
+            level_pages = next_level
+
+        candidates = [p for p in self.pages.values() if not p.error]
+        weights = [EMAIL_SLUGS.get(p.path[1:].rsplit("-", 1)[0], 1) for p in candidates]
+        chosen = set()
+        while len(chosen) < min(emails, len(candidates)):
+            chosen.add(rng.choices(range(len(candidates)), weights)[0])
+        for i in chosen:
+            page = candidates[i]
+            page.email = f"{USERNAMES[page.number % len(USERNAMES)]}{page.number}@site{index}.localhost"
+        self.planted = {p.email for p in self.pages.values() if p.email}
+        self._filler = " ".join(rng.choice(WORDS) for _ in range(page_kb * 1024 // 6))
+
+    def render(self, page, base_url):
+        links = []
+        for child in page.children:
+            text = child.path[1:].rsplit("-", 1)[0].replace("-", " ").title()
+            links.append(f'<li><a href="{child.path}">{text}</a></li>')
+            variants = [f"{child.path}#main", f"{child.path}?utm_source=bench", f"{child.path}/", f"{base_url}{child.path}"]
+            links.extend(f'<li><a href="{v}">{text}</a></li>' for v in variants[:self.duplicates])
+        email = f"<p>Write to us at {page.email}</p>" if page.email else ""
+        body = (f"<!DOCTYPE html><html><head><title>Site {self.index} page {page.number}</title></head><body>"
+                f"<nav><ul>{''.join(links)}</ul></nav><main><p>{self._filler}</p>{email}</main>"
+                f"<footer><a href='/'>Home</a></footer></body></html>")
+        return body.encode()
+
+
+class SiteStats:
+    """What one site served since the last reset."""
+
+    def __init__(self):
+        self.requests = 0
+        self.page_requests = 0
+        self.bytes_sent = 0
+        self.errors = 0
+        self.first_served = {}  # path -> seconds since reset
+        self.email_times = {}  # planted email -> seconds since reset it was first served
+
+
+class SiteFarm:
+    """Serves SyntheticSites on localhost, one port each, counting what every crawler fetched."""
+
+    def __init__(self, sites, latency=0.05):
+        self.sites = sites
+        self.latency = latency
+        self.servers = []
+        self.urls = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self.stats = [SiteStats() for _ in self.sites]
+
+    def _handler(self, number):
+        farm, site = self, self.sites[number]
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(farm.latency)
+                path = self.path.split("#")[0].split("?")[0]
+                page = site.pages.get(path.rstrip("/") or "/")
+                if page and page.slow:
+                    time.sleep(site.slow_delay)
+                if page is None or page.error:
+                    status, body = (404, b"Not found") if page is None else (500, b"Server error")
+                else:
+                    status, body = 200, site.render(page, f"http://{self.headers.get('Host', '')}")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                farm._record(number, page, status, len(body))
+
+        return Handler
+
+    def _record(self, number, page, status, size):
+        with self._lock:
+            stats = self.stats[number]
+            now = time.monotonic() - self.started
+            stats.requests += 1
+            stats.bytes_sent += size
+            if status >= 500:
+                stats.errors += 1
+            if page is not None and status == 200:
+                stats.page_requests += 1
+                stats.first_served.setdefault(page.path, now)
+                if page.email:
+                    stats.email_times.setdefault(page.email, now)
+
+    def start(self):
+        for number in range(len(self.sites)):
+            server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler(number))
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+            self.urls.append(f"http://localhost:{server.server_address[1]}/")
+        return self.urls
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,165 @@
+import argparse, csv, glob, os, re, subprocess, sys, tempfile, threading, time
+
+from farm import SiteFarm, SyntheticSite
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOLS_DIR = os.path.dirname(CURRENT_DIR)
+V2_OUTPUT_DIR = os.path.normpath(os.path.join(TOOLS_DIR, "..", "exports", "1-python-approach"))
+
+# name -> (tool folder, how it takes its sites)
+VARIANTS = {
+    "v1": ("1-python-approach", "stdin"),  # asks for one URL, crawls the whole site
+    "v3": ("2-python-approach-v3", "stdin"),
+    "v4": ("2-python-approach-v4", "csv"),  # main.py input.csv
+    "v5": ("2-python-approach-v5", "csv"),
+    "V2": ("1-python-approach-V2", "input"),  # main.py --input input.csv
+}
+
+PLANTED_EMAIL = re.compile(r"[a-z]+\d+@site\d+\.localhost")
+
+def write_input(path, urls, threshold, timeout_minutes):
+    with open(path, "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Website URL", "Email Threshold", "Timeout Threshold (minutes)", "Results File"])
+        for url in urls:
+            # V2 writes a file name into "Results File"; a placeholder keeps the column text, not float
+            writer.writerow([url, threshold, timeout_minutes, "-"])
+
+def run_process(command, cwd, env, log, stdin_text=None, max_seconds=600):
+    """Run `command` to completion; returns (exit code, peak RSS in bytes)."""
+    proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            stdin=subprocess.PIPE if stdin_text is not None else subprocess.DEVNULL)
+    killer = threading.Timer(max_seconds, proc.kill)
+    killer.start()
+    if stdin_text is not None:
+        proc.stdin.write(stdin_text.encode())
+        proc.stdin.close()
+    # wait4 gives this child's own rusage, unlike RUSAGE_CHILDREN which keeps the max of all runs
+    _, status, usage = os.wait4(proc.pid, 0)
+    killer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage.ru_maxrss * 1024
+
+def emails_in(paths):
+    found = set()
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            found.update(PLANTED_EMAIL.findall(f.read()))
+    return found
+
+def new_files(pattern, since):
+    return [p for p in glob.glob(pattern) if os.path.getmtime(p) >= since]
+
+def run_variant(name, farm, args, env, work_dir):
+    """Crawl every farm site with one crawler; returns (emails it reported, peak RSS, wall seconds, per-site start offsets)."""
+    folder, style = VARIANTS[name]
+    tool_dir = os.path.join(TOOLS_DIR, folder)
+    log_path = os.path.join(work_dir, f"{name}.log")
+    found, peak_rss = set(), 0
+    farm.reset()
+    start = time.time()
+    with open(log_path, "w") as log:
+        if style == "stdin":
+            # One run per site; each site's clock starts with its run
+            starts = []
+            for url in farm.urls:
+                starts.append(time.monotonic() - farm.started)
+                run_start = time.time()
+                _, rss = run_process([sys.executable, "main.py"], tool_dir, env, log, url + "\n", args.max_seconds)
+                found |= emails_in(new_files(os.path.join(tool_dir, "exports", "*_emails.csv"), run_start - 1))
+                peak_rss = max(peak_rss, rss)
+        else:
+            starts = [0.0] * len(farm.urls)
+            input_csv = os.path.join(work_dir, f"{name}-input.csv")
+            write_input(input_csv, farm.urls, args.threshold, args.timeout_minutes)
+            command = [sys.executable, "main.py", input_csv] if style == "csv" else [sys.executable, "main.py", "--input", input_csv]
+            _, peak_rss = run_process(command, tool_dir, env, log, max_seconds=args.max_seconds)
+            if style == "csv":
+                found = emails_in(new_files(os.path.join(tool_dir, "exports", "*_emails.csv"), start - 1))
+            else:
+                found = emails_in(new_files(os.path.join(work_dir, "*.csv"), start))
+                # V2 also saves a CSV per site next to the real exports; the farm's are removed
+                for path in new_files(os.path.join(V2_OUTPUT_DIR, "localhost_*.csv"), start - 1):
+                    os.remove(path)
+    return found, peak_rss, time.time() - start, starts
+
+def summarize(name, farm, found, peak_rss, wall, starts, threshold):
+    page_requests = sum(s.page_requests for s in farm.stats)
+    unique_pages = sum(len(s.first_served) for s in farm.stats)
+    bytes_sent = sum(s.bytes_sent for s in farm.stats)
+    to_threshold, recalled, expected = [], 0, 0
+    for site, stats, start in zip(farm.sites, farm.stats, starts):
+        want = min(threshold, len(site.planted))
+        times = sorted(stats.email_times.values())
+        if len(times) >= want:
+            to_threshold.append(times[want - 1] - start)
+        recalled += min(len(found & site.planted), want)
+        expected += want
+    return {
+        "variant": name,
+        "pages_per_sec": page_requests / wall if wall else 0,
+        "requests": sum(s.requests for s in farm.stats),
+        "duplicates": page_requests - unique_pages,
+        "errors": sum(s.errors for s in farm.stats),
+        # Mean over the sites that got there; "-" if a site never served enough planted emails
+        "time_to_threshold": sum(to_threshold) / len(to_threshold) if len(to_threshold) == len(farm.sites) else None,
+        "mb_sent": bytes_sent / 1024 / 1024,
+        "peak_rss_mb": peak_rss / 1024 / 1024,
+        "recall": recalled / expected if expected else 0,
+        "wall": wall,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the crawlers against a synthetic site farm on localhost and compare them')
+    parser.add_argument('--variants', default=",".join(VARIANTS), help=f'Comma-separated crawlers to run ({", ".join(VARIANTS)})')
+    parser.add_argument('--sites', type=int, default=2, help='Synthetic sites, each on its own port')
+    parser.add_argument('--depth', type=int, default=3, help='Link levels below the home page')
+    parser.add_argument('--fanout', type=int, default=5, help='Child links per page')
+    parser.add_argument('--page-kb', type=int, default=20, help='Approximate page size in KB')
+    parser.add_argument('--emails', type=int, default=20, help='Planted emails per site')
+    parser.add_argument('--duplicates', type=int, default=2, help='Variant links (fragment, tracking param, slash, absolute) per child, 0-4')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds before every response')
+    parser.add_argument('--slow-ratio', type=float, default=0.05, help='Share of pages that answer slowly')
+    parser.add_argument('--slow-delay', type=float, default=1.0, help='Extra seconds for a slow page')
+    parser.add_argument('--error-ratio', type=float, default=0.02, help='Share of pages that answer 500')
+    parser.add_argument('--threshold', type=int, default=10, help='Email threshold per site (time-to-threshold and recall use it too)')
+    parser.add_argument('--timeout-minutes', type=int, default=5, help='Per-site timeout given to the crawlers that take one')
+    parser.add_argument('--max-seconds', type=int, default=600, help='Kill a crawler run after this long')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='Extra environment for every crawler, e.g. FRONTIER=bfs')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.variants.split(",") if n.strip()]
+    unknown = [n for n in names if n not in VARIANTS]
+    if unknown:
+        parser.error(f"unknown variants {unknown}, expected some of {list(VARIANTS)}")
+
+    sites = [SyntheticSite(i, args.depth, args.fanout, args.page_kb, args.emails, args.duplicates,
+                           args.slow_ratio, args.slow_delay, args.error_ratio, args.seed) for i in range(args.sites)]
+    farm = SiteFarm(sites, args.latency)
+    farm.start()
+    # V2 streams its consolidated report to a CSV next to the input, where it can be read back
+    env = {**os.environ, "REPORT_MODE": "stream", "PYTHONUNBUFFERED": "1"}
+    env.update(item.split("=", 1) for item in args.set)
+
+    print(f"{args.sites} sites, {len(sites[0].pages)} pages and {len(sites[0].planted)} planted emails each, "
+          f"threshold {args.threshold}\n")
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="crawler-bench-") as work_dir:
+        try:
+            for name in names:
+                print(f"Running {name}...", flush=True)
+                found, peak_rss, wall, starts = run_variant(name, farm, args, env, work_dir)
+                rows.append(summarize(name, farm, found, peak_rss, wall, starts, args.threshold))
+        finally:
+            farm.stop()
+
+    print(f"\n{'Variant':<9}{'Pages/s':>9}{'Requests':>10}{'Dup fetches':>13}{'5xx':>6}{'To threshold':>14}"
+          f"{'MB sent':>9}{'Peak RSS MB':>13}{'Recall':>8}{'Wall s':>8}")
+    for r in rows:
+        ttt = f"{r['time_to_threshold']:.1f}s" if r['time_to_threshold'] is not None else "-"
+        print(f"{r['variant']:<9}{r['pages_per_sec']:>9.1f}{r['requests']:>10}{r['duplicates']:>13}{r['errors']:>6}{ttt:>14}"
+              f"{r['mb_sent']:>9.1f}{r['peak_rss_mb']:>13.0f}{r['recall']:>8.0%}{r['wall']:>8.1f}")
+
+if __name__ == "__main__":
+    main()